@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir  = os.path.dirname(bench_dir)
+
+# open-loop load test of src/api.py: requests are fired on a fixed schedule
+# (not when the previous one returns), so a slow server shows up as latency
+# instead of a quietly lower request rate. Plain asyncio over keep-alive
+# connections — no HTTP client dependency.
+#
+# the mix is mostly simulator calls drawn from a pool of slider-like settings,
+# so the LRU sees a realistic share of repeats
+
+host     = "127.0.0.1"
+port     = 8000
+rate     = 300      # requests per second
+duration = 10.0     # seconds
+connections = 32
+pool_size   = 500   # distinct simulator settings in the mix
+
+jobs = ["admin.", "blue-collar", "management", "retired", "student", "technician"]
+
+
+def request_mix(n, seed=0):
+    rng      = random.Random(seed)
+    settings = [
+        f"/simulate?customers={rng.randrange(1000, 100001, 1000)}&revenue={rng.randrange(50, 2001, 10)}"
+        f"&cost_cellular={rng.randrange(2, 21) / 2}&cost_standard={rng.randrange(1, 11) / 2}"
+        for _ in range(pool_size)
+    ]
+    paths = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.7:
+            paths.append(rng.choice(settings))
+        elif roll < 0.9:
+            paths.append(f"/cate?job={rng.choice(jobs)}&age={rng.randrange(18, 90)}&balance={rng.randrange(-2000, 20000)}")
+        elif roll < 0.95:
+            paths.append("/estimate")
+        else:
+            paths.append("/refutations")
+    return paths
+
+
+async def connect(host, port):
+    return await asyncio.open_connection(host, port)
+
+
+async def fetch(conn, host, path):
+    reader, writer = conn
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def run(host=host, port=port, rate=rate, duration=duration, connections=connections, seed=0):
+    n       = int(rate * duration)
+    paths   = request_mix(n, seed)
+    idle    = asyncio.Queue()
+    for _ in range(connections):
+        idle.put_nowait(await connect(host, port))
+
+    latencies = np.full(n, np.nan)
+    statuses  = np.zeros(n, dtype=int)
+
+    async def one(i, due):
+        # latency runs from the scheduled send time, so waiting for a free
+        # connection counts against the server too
+        conn = await idle.get()
+        try:
+            statuses[i], _ = await fetch(conn, host, paths[i])
+            latencies[i]   = time.perf_counter() - due
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            conn = await connect(host, port)
+        idle.put_nowait(conn)
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(n):
+        due   = start + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i, due)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    while not idle.empty():
+        _, writer = idle.get_nowait()
+        writer.close()
+
+    ok = statuses == 200
+    ms = latencies[ok] * 1000
+    # no successful request means no latency to report; None keeps the
+    # error count visible instead of failing on an empty percentile
+    return {
+        "requests":     n,
+        "ok":           int(ok.sum()),
+        "errors":       int(n - ok.sum()),
+        "target_rps":   rate,
+        "achieved_rps": n / elapsed,
+        "p50_ms":       float(np.percentile(ms, 50)) if ms.size else None,
+        "p95_ms":       float(np.percentile(ms, 95)) if ms.size else None,
+        "p99_ms":       float(np.percentile(ms, 99)) if ms.size else None,
+        "max_ms":       float(ms.max()) if ms.size else None,
+    }
+
+
+async def health(host=host, port=port):
+    conn = await connect(host, port)
+    try:
+        _, body = await fetch(conn, host, "/health")
+    finally:
+        conn[1].close()
+    return json.loads(body)
+
+
+def wait_for(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return asyncio.run(health(host, port))
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"api did not come up on {host}:{port} within {timeout:.0f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test of the JSON API")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--rate", type=int, nargs="+", default=[rate], help="requests per second (one run per rate)")
+    parser.add_argument("--duration", type=float, default=duration, help="seconds per run")
+    parser.add_argument("--connections", type=int, default=connections, help="keep-alive connections")
+    parser.add_argument("--spawn", action="store_true", help="start src/api.py for the run and stop it afterwards")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, os.path.join(repo_dir, "src", "api.py"),
+                                   "--host", args.host, "--port", str(args.port)], cwd=repo_dir)
+    try:
+        wait_for(args.host, args.port)
+        print(f"  {'rate':>6} {'achieved':>9} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for r in args.rate:
+            res = asyncio.run(run(args.host, args.port, r, args.duration, args.connections))
+            cols = [res[f"{q}_ms"] for q in ("p50", "p95", "p99", "max")]
+            cols = " ".join(f"{'':>8}" if c is None else f"{c:>6.2f}ms" for c in cols)
+            print(f"  {r:>6} {res['achieved_rps']:>8.0f}/s {res['errors']:>7} {cols}")
+
+        cache = asyncio.run(health(args.host, args.port))["cache"]
+        for name, c in cache.items():
+            total = c["hits"] + c["misses"]
+            print(f"  {name} cache: {c['hits']:,} hits / {total:,} ({c['hits'] / max(total, 1):.0%}), {c['size']:,} entries")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,320 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib.metadata import version
+
+import numpy as np
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir  = os.path.dirname(bench_dir)
+sys.path.insert(0, os.path.join(repo_dir, "src"))
+
+# end-to-end benchmark of the pipeline's hot paths at 1x / 10x the rows of
+# bank-full-cleaned.csv (100x on request; the model fits need ~10 GB there).
+# every measurement runs in a fresh subprocess whose working directory is a
+# scratch copy of data/, so peak RSS is per-benchmark and nothing under the
+# real data/ or artifacts/ is touched
+
+cleaned_path   = os.path.join(repo_dir, "data", "bank-full-cleaned.csv")
+encodings_path = os.path.join(repo_dir, "data", "encodings.json")
+dag_path       = os.path.join(repo_dir, "data", "dag.json")
+baseline_path  = os.path.join(bench_dir, "baseline.json")
+output_path    = os.path.join(bench_dir, "results.json")
+
+default_scales = [1, 10]   # the scales baseline.json covers
+threshold      = 0.25   # flag anything more than 25% slower / bigger than the baseline
+simulations    = 1      # DoWhy refuter simulations per benchmark — one is one full refit
+seed           = 42
+min_repeats    = 1
+max_repeats    = 50
+
+refuter_names = ["placebo", "random_cause", "subset", "bootstrap"]
+benchmarks    = (
+    ["clean_data", "build_causal_model[dowhy]", "build_causal_model[native]", "channels"]
+    + [f"refuter[{name}]" for name in refuter_names]
+    + ["refuter[placebo-native]", "refuter[bootstrap-native]",
+       "refuter[random_cause-native]", "refuter[subset-native]", "simulator", "simulator[sweep]"]
+)
+
+
+# ---- workspace ----
+
+def raw_columns(df, encodings):
+    # undo the cleaning transform so clean_data() has a raw file to chew on
+    vocab  = encodings["vocab"]
+    months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+    yes_no = np.array(['no', 'yes'])
+
+    raw = df.drop(columns=['treatment', 'was_previously_contacted', 'outcome'])
+    for col in ['job', 'marital', 'education', 'contact', 'poutcome']:
+        raw[col] = np.asarray(vocab[col])[df[col].to_numpy()]
+    for col in ['default', 'housing', 'loan']:
+        raw[col] = yes_no[df[col].to_numpy()]
+    # treatment is flagged before imputation, so a non-cellular row whose
+    # contact code is cellular was an imputed 'unknown'
+    cellular     = vocab['contact'].index('cellular')
+    raw['contact'] = np.where((df['treatment'] == 0) & (df['contact'] == cellular), 'unknown', raw['contact'])
+    raw['month'] = np.asarray(months)[df['month'].to_numpy() - 1]
+    raw['pdays'] = np.where(df['was_previously_contacted'] == 1, df['pdays'], -1)
+    raw['y']     = yes_no[df['outcome'].to_numpy()]
+    return raw
+
+
+def prepare_workspace(root, scale):
+    # data/ for one scale: the cleaned file upscaled by resampling rows,
+    # its Feather copy, the encodings, the graph spec and a matching raw file
+    from data_io import load_cleaned, write_columnar
+
+    workspace = os.path.join(root, f"x{scale}")
+    data_dir  = os.path.join(workspace, "data")
+    os.makedirs(data_dir, exist_ok=True)
+
+    df = load_cleaned(cleaned_path, os.path.splitext(cleaned_path)[0] + ".feather")
+    if scale > 1:
+        rows = np.random.default_rng(seed).integers(0, len(df), size=len(df) * scale)
+        df   = df.iloc[rows].reset_index(drop=True)
+
+    shutil.copy(encodings_path, data_dir)
+    shutil.copy(dag_path, data_dir)
+    with open(encodings_path) as f:
+        encodings = json.load(f)
+
+    target = os.path.join(data_dir, "bank-full-cleaned.csv")
+    df.to_csv(target, index=False)
+    write_columnar(df, target, os.path.join(data_dir, "bank-full-cleaned.feather"))
+    raw_columns(df, encodings).to_csv(os.path.join(data_dir, "bank-full.csv"), sep=';', index=False)
+    return workspace, len(df)
+
+
+# ---- child side: one benchmark, one process ----
+
+def reset_peak_rss():
+    # Linux lets a process reset its own RSS high-water mark, so setup work
+    # (imports, loading data) doesn't count towards the benchmark's peak
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb(field="VmHWM"):
+    # VmHWM = peak resident set, VmRSS = current; ru_maxrss where /proc is missing
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def setup(name):
+    # returns the zero-argument callable to measure; anything it needs that
+    # isn't part of the measured work happens here
+    if name == "clean_data":
+        from cleaning import clean_data
+        return lambda: clean_data("data/bank-full.csv", "data/bank-full-cleaned.csv")
+
+    # every other benchmark loads DoWhy anyway, so one import covers them all
+    from causal_model import build_causal_model, run_channels
+
+    if name.startswith("build_causal_model"):
+        engine = name[len("build_causal_model["):-1]
+        return lambda: build_causal_model(engine=engine, use_cache=False)
+
+    if name == "channels":
+        return lambda: run_channels()
+
+    if name == "simulator[sweep]":
+        from results import read_replicates
+        from simulator import sweep
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_causal_model(engine="native", use_cache=False)
+        _, ate = read_replicates()
+        return lambda: sweep(ate.mean(), ate)
+
+    if name == "simulator":
+        from results import read_replicates
+        from simulator import campaign_sizes, draw_rates, simulate
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_causal_model(engine="native", use_cache=False)
+        baseline, ate = read_replicates()
+
+        def project():
+            draws = draw_rates(baseline, ate, baseline.mean(), ate.mean(), baseline.mean(), ate.mean())
+            return simulate(campaign_sizes, *draws, 250, 3.0, 1.0)
+        return project
+
+    if name.startswith("refuter"):
+        from data_io import load_cleaned
+        import refutation_tests as rt
+        refuter = name[len("refuter["):-1]
+        df      = load_cleaned(rt.data_path)
+
+        if refuter.endswith("-native"):
+            from estimators import bootstrap_ate, design_matrix, estimate_ate, placebo_ate, random_cause_ate, subset_ate
+            fit = estimate_ate(df[rt.confounders], df['treatment'], df['outcome'])
+            if refuter == "placebo-native":
+                return lambda: placebo_ate(fit["strata"], df['treatment'], df['outcome'],
+                                           n_perm=rt.placebo_permutations, seed=seed)
+            if refuter in ("random_cause-native", "subset-native"):
+                # same simulation count as the DoWhy refuter benchmarks, so the two compare directly
+                design = design_matrix(df[rt.confounders])
+                refit  = random_cause_ate if refuter == "random_cause-native" else subset_ate
+                return lambda: refit(design, df['treatment'], df['outcome'], fit["coef"], fit["intercept"],
+                                     n_sims=simulations, seed=seed)
+            return lambda: bootstrap_ate(fit["strata"], df['treatment'], df['outcome'],
+                                         n_boot=rt.bootstrap_replicates, seed=seed)
+
+        model    = rt.build_model(df)
+        estimand = model.identify_effect(proceed_when_unidentifiable=True)
+        estimate = model.estimate_effect(estimand, method_name=rt.method, target_units="ate")
+        return lambda: rt.run_simulations(df, estimand, estimate, workers=1, seed=seed,
+                                          n_sims=simulations, names=[refuter])
+
+    raise ValueError(f"unknown benchmark {name!r}")
+
+
+def run_child(name, trace):
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    fn = setup(name)
+    if trace:
+        # allocation pass — tracemalloc slows everything down, so its timing is not used
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"alloc_peak_mb": peak / 2**20}
+
+    exact = reset_peak_rss()
+    start_rss = rss_mb("VmRSS")
+    with contextlib.redirect_stdout(io.StringIO()):
+        # anything that finishes in milliseconds is repeated and the best
+        # time kept, so one scheduler hiccup isn't recorded as a regression
+        times = []
+        while len(times) < min_repeats or (sum(times) < 0.1 and len(times) < max_repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    return {"wall_s": min(times), "repeats": len(times), "peak_rss_mb": rss_mb(), "start_rss_mb": start_rss, "rss_reset": exact}
+
+
+# ---- parent side ----
+
+def measure(name, workspace, trace):
+    # -u so a crash still shows its traceback; the JSON result is the last line
+    proc = subprocess.run(
+        [sys.executable, "-u", os.path.abspath(__file__), "--child", name] + (["--trace"] if trace else []),
+        cwd=workspace, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def environment():
+    return {
+        "python":   platform.python_version(),
+        "platform": platform.platform(),
+        "cpus":     os.cpu_count(),
+        **{pkg: version(pkg) for pkg in ["numpy", "pandas", "scikit-learn", "dowhy", "pyarrow"]},
+    }
+
+
+def compare(results, baseline, threshold=threshold):
+    # (benchmark, scale, metric, baseline, now, ratio) for every metric over threshold
+    regressions = []
+    for key, now in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        for metric in ["wall_s", "peak_rss_mb", "alloc_peak_mb"]:
+            if metric in now and metric in before and before[metric] > 0:
+                ratio = now[metric] / before[metric]
+                if ratio > 1 + threshold:
+                    regressions.append((key, metric, before[metric], now[metric], ratio))
+    return regressions
+
+
+def run(scales, names, trace=True, workdir=None):
+    root    = workdir or tempfile.mkdtemp(prefix="oracle-bench-")
+    results = {}
+    try:
+        for scale in scales:
+            workspace, rows = prepare_workspace(root, scale)
+            print(f"\n{scale}x — {rows:,} rows")
+            for name in names:
+                entry = {"benchmark": name, "scale": scale, "rows": rows, **measure(name, workspace, False)}
+                if trace:
+                    entry.update(measure(name, workspace, True))
+                results[f"{name}@{scale}x"] = entry
+
+                alloc = f"  alloc {entry['alloc_peak_mb']:>8.1f} MB" if trace else ""
+                print(f"  {name:<28} {entry['wall_s']:>9.3f}s  rss {entry['peak_rss_mb']:>8.1f} MB{alloc}")
+    finally:
+        if workdir is None:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline's hot paths at several data scales")
+    parser.add_argument("--scales", type=int, nargs="+", default=default_scales,
+                        help="row multipliers of bank-full-cleaned.csv")
+    parser.add_argument("--only", nargs="+", default=None, choices=benchmarks, metavar="NAME",
+                        help=f"subset of: {', '.join(benchmarks)}")
+    parser.add_argument("--no-alloc", action="store_true", help="skip the (slow) tracemalloc pass")
+    parser.add_argument("--output", default=output_path, help="where to write this run's JSON")
+    parser.add_argument("--baseline", default=baseline_path, help="stored run to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=threshold,
+                        help="allowed slowdown / growth over the baseline (0.25 = 25%%)")
+    parser.add_argument("--workdir", default=None, help="keep the scratch datasets here instead of a temp dir")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.trace)))
+        sys.exit(0)
+
+    results = run(args.scales, args.only or benchmarks, trace=not args.no_alloc, workdir=args.workdir)
+    report  = {
+        "created":     datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results":     results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved to {args.output}")
+
+    if args.save_baseline:
+        shutil.copy(args.output, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        print(f"\nCompared with {args.baseline} ({baseline['created']}, threshold +{args.threshold:.0%})")
+        for key, metric, before, now, ratio in regressions:
+            print(f"  REGRESSION {key:<36} {metric:<14} {before:>10.3f} -> {now:>10.3f}  ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("  no regressions")
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from results import manifest_path, read_replicates, read_results
+from segments import age_edges, age_labels, balance_edges, balance_labels, encodings_path, load_cube
+from simulator import draw_rates, simulate
+
+# headless JSON API over the pipeline's outputs, for systems that can't drive
+# the Streamlit page: the estimate, the refutation scorecard, segment CATEs
+# and the What-If simulator
+#
+# everything it serves is read once at startup (manifest, bootstrap draws,
+# segment cube) — restart the service after a pipeline run. Responses are
+# rendered to JSON bytes once per distinct set of parameters and kept in an
+# in-process LRU, so a repeated request costs a dict lookup
+
+host       = "127.0.0.1"
+port       = 8000
+cache_size = 4096
+
+# accepted ranges for the simulator parameters
+limits = {
+    "customers":     (1, 10_000_000),
+    "revenue":       (0.01, 100_000.0),
+    "cost_cellular": (0.0, 1_000.0),
+    "cost_standard": (0.0, 1_000.0),
+}
+
+_state = {}
+
+
+def load_state(path=manifest_path):
+    results = read_results(path)
+    if "estimate" not in results:
+        raise FileNotFoundError(f"no estimate in {path} — run src/causal_model.py first")
+
+    estimate = results["estimate"]
+    boot_baseline, boot_ate = read_replicates(estimate["bootstrap"]["path"])
+    _state.clear()
+    _state.update(
+        results     = results,
+        estimate    = _json(estimate),
+        refutations = _json(results["refutations"]) if "refutations" in results else None,
+        draws       = draw_rates(boot_baseline, boot_ate, estimate["baseline_rate"], estimate["ate"],
+                                 estimate["bootstrap"]["baseline_rate"], estimate["bootstrap"]["ate"]),
+        cube        = None,
+    )
+
+    segments = results.get("segments")
+    if segments and os.path.exists(segments["path"]):
+        with open(encodings_path) as f:
+            jobs = json.load(f)["vocab"]["job"]
+        _state.update(cube=load_cube(segments["path"]), jobs=jobs, min_size=segments["min_segment_size"])
+
+    # cached responses describe the state they were built from
+    for cached in (cate_response, simulate_response):
+        cached.cache_clear()
+
+
+def _json(body):
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def _number(params, name, default, kind=float):
+    value = params.get(name, default)
+    try:
+        value = kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    low, high = limits[name]
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low:g} and {high:g}, got {value:g}")
+    return value
+
+
+@lru_cache(maxsize=cache_size)
+def cate_response(job, age_band, balance_band):
+    # keyed by segment rather than raw age / balance, so every customer in a
+    # segment shares one entry
+    seg = {name: values[job, age_band, balance_band] for name, values in _state["cube"].items()}
+    return _json({
+        "job":      _state["jobs"][job],
+        "age":      age_labels[age_band],
+        "balance":  balance_labels[balance_band],
+        "n":        int(seg["n"]),
+        "cate":     None if np.isnan(seg["cate"]) else float(seg["cate"]),
+        "ci_low":   None if np.isnan(seg["ci_low"]) else float(seg["ci_low"]),
+        "ci_high":  None if np.isnan(seg["ci_high"]) else float(seg["ci_high"]),
+        # the What-If page won't target segments smaller than this
+        "reliable": bool(seg["n"] >= _state["min_size"]),
+    })
+
+
+@lru_cache(maxsize=cache_size)
+def simulate_response(customers, revenue, cost_cellular, cost_standard):
+    # the What-If page's numbers for one campaign setting
+    estimate = _state["results"]["estimate"]
+    baseline_rate, ate = estimate["baseline_rate"], estimate["ate"]
+
+    baseline_profit  = int(customers * baseline_rate) * revenue - customers * cost_standard
+    strategic_profit = int(customers * (baseline_rate + ate)) * revenue - customers * cost_cellular
+    added_profit     = strategic_profit - baseline_profit
+
+    sim = simulate([customers], *_state["draws"], revenue, cost_cellular, cost_standard)
+    prob_profit = float(sim["prob_profit"])
+    if added_profit > 0 and prob_profit >= 0.9:
+        recommendation = "proceed"
+    elif added_profit > 0:
+        recommendation = "marginal"
+    else:
+        recommendation = "hold"
+
+    return _json({
+        "customers":        customers,
+        "revenue":          revenue,
+        "cost_cellular":    cost_cellular,
+        "cost_standard":    cost_standard,
+        "baseline_profit":  baseline_profit,
+        "strategic_profit": strategic_profit,
+        "added_profit":     added_profit,
+        "added_profit_90":  [float(sim["added"][0, 0]), float(sim["added"][-1, 0])],
+        "prob_profit":      prob_profit,
+        "break_even":       sim["break_even"],
+        "recommendation":   recommendation,
+    })
+
+
+# ---- routes ----
+
+def _bytes(body, status=200):
+    return Response(body, status_code=status, media_type="application/json")
+
+
+def _error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def health(request):
+    info = {name: cached.cache_info() for name, cached in (("cate", cate_response), ("simulate", simulate_response))}
+    return JSONResponse({
+        "status":   "ok",
+        "manifest": _state["results"]["estimate"]["created"],
+        "cache":    {name: {"hits": c.hits, "misses": c.misses, "size": c.currsize, "max": c.maxsize}
+                     for name, c in info.items()},
+    })
+
+
+async def estimate(request):
+    return _bytes(_state["estimate"])
+
+
+async def refutations(request):
+    if _state["refutations"] is None:
+        return _error(f"no refutation results in {manifest_path} — run src/refutation_tests.py", 404)
+    return _bytes(_state["refutations"])
+
+
+async def cate(request):
+    if _state["cube"] is None:
+        return _error(f"no segment cube in {manifest_path} — run src/segments.py", 404)
+    params = request.query_params
+    job    = params.get("job", "")
+    try:
+        # a job label from the encodings, or its code
+        job = _state["jobs"].index(job) if job in _state["jobs"] else int(job)
+        if not 0 <= job < len(_state["jobs"]):
+            raise ValueError
+    except ValueError:
+        return _error(f"job must be one of {_state['jobs']} or a code 0-{len(_state['jobs']) - 1}, got {job!r}")
+    try:
+        age     = int(params.get("age", ""))
+        balance = int(params.get("balance", ""))
+    except ValueError:
+        return _error("age and balance must be integers")
+    return _bytes(cate_response(job, int(np.digitize(age, age_edges)), int(np.digitize(balance, balance_edges))))
+
+
+async def simulate_campaign(request):
+    params = request.query_params
+    try:
+        # parsed before the cache lookup, so "250" and "250.0" share an entry
+        args = (
+            _number(params, "customers",     10000, int),
+            _number(params, "revenue",       250.0),
+            _number(params, "cost_cellular", 3.0),
+            _number(params, "cost_standard", 1.0),
+        )
+    except ValueError as e:
+        return _error(str(e))
+    return _bytes(simulate_response(*args))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    load_state(app.state.manifest_path)
+    yield
+
+
+def create_app(path=manifest_path):
+    app = Starlette(
+        routes=[
+            Route("/health",      health),
+            Route("/estimate",    estimate),
+            Route("/refutations", refutations),
+            Route("/cate",        cate),
+            Route("/simulate",    simulate_campaign),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.manifest_path = path
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the causal estimate, refutations, CATEs and simulator as JSON")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--manifest", default=manifest_path, help="results manifest to serve")
+    args = parser.parse_args()
+
+    print(f"Serving {args.manifest} on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(args.manifest), host=args.host, port=args.port, log_level="warning", access_log=False)
@@ -1,15 +1,53 @@
-import pandas as pd
-import networkx as nx
+import argparse
+import os
+import time
+import numpy as np
 from dowhy import CausalModel
+from dag import build_graph, common_causes, identify
+from cleaning import encodings_path, load_encodings
+from data_io import load_cleaned
+from comparison import compare_estimators, estimator_methods
+from estimators import assign_strata, bootstrap_ate, estimate_ate, estimate_channel_ates, strata_edges
+from model_cache import cache_dir, cache_key, describe_fit, load_fit, method, save_fit
+from results import (channel_replicates_path, read_results, replicates_path, write_channel_replicates,
+                     write_replicates, write_results)
+from tracing import span
+import tracing
 import warnings
 warnings.filterwarnings('ignore')
 
 data_path = "data/bank-full-cleaned.csv"
+engines   = ["dowhy", "native"]
 
+# confounders are pre-existing customer traits that affect both
+# who gets called via cellular AND whether they subscribe — read from the
+# shared graph spec in data/dag.json
+confounders = common_causes(build_graph())
 
-def build_causal_model():
+# bootstrap replicates handed to the What-If simulator
+bootstrap_replicates = 2000
+bootstrap_seed       = 42
 
-    df = pd.read_csv(data_path)
+# --channels: contact as a categorical treatment rather than cellular vs the
+# rest. The cleaned data still tells the three apart — cellular is treatment 1,
+# telephone keeps its contact code, and the rest were 'unknown' before
+# imputation turned them into cellular codes
+channel_labels    = ["cellular", "telephone", "unknown"]
+reference_channel = "telephone"
+
+
+def contact_channel(df, encodings_path=encodings_path):
+    telephone = load_encodings(encodings_path)["vocab"]["contact"].index("telephone")
+    return np.where(df['treatment'] == 1, 0, np.where(df['contact'] == telephone, 1, 2))
+
+
+def build_causal_model(engine="dowhy", use_cache=True):
+
+    if engine not in engines:
+        raise ValueError(f"engine must be one of {engines}, got {engine!r}")
+
+    with span("load", profile=True):
+        df = load_cleaned(data_path)
 
     # quick look at the raw numbers before any causal work
     cellular_rate    = df[df['treatment'] == 1]['outcome'].mean()
@@ -21,57 +59,194 @@ def build_causal_model():
     print(f"Raw difference (biased)       : {raw_diff:.2%}")
     print("Note: this gap is inflated by demographics — DoWhy will correct it\n")
 
-    # build the causal graph as a networkx DiGraph
-    # using networkx directly avoids the pydot/graphviz compatibility issues
-    graph = nx.DiGraph()
-
-    # confounders are pre-existing customer traits that affect both
-    # who gets called via cellular AND whether they subscribe
-    confounders = ['age', 'job', 'education', 'marital', 'balance', 'housing', 'loan', 'default']
-    for node in confounders:
-        graph.add_edge(node, 'treatment')
-        graph.add_edge(node, 'outcome')
-
-    # previous campaign history affects outcome but not contact method
-    graph.add_edge('poutcome', 'outcome')
-    graph.add_edge('was_previously_contacted', 'outcome')
-
-    # the main relationship we're testing
-    graph.add_edge('treatment', 'outcome')
-
-    # note: duration, campaign, month, day are excluded because they are
-    # post-treatment variables — they happen during or after the call,
-    # so including them would corrupt the ATE estimate
-
-    model = CausalModel(
-        data      = df,
-        treatment = 'treatment',
-        outcome   = 'outcome',
-        graph     = graph
-    )
-
-    # identify how to isolate the causal effect — DoWhy uses the backdoor criterion
-    identified_estimand = model.identify_effect(proceed_when_unidentifiable=True)
-    print(identified_estimand)
-
-    # propensity score stratification groups customers by their likelihood
-    # of being called via cellular — within each group they're comparable,
-    # so the remaining difference in subscription rates is genuinely causal
-    estimate = model.estimate_effect(
-        identified_estimand,
-        method_name  = "backdoor.propensity_score_stratification",
-        target_units = "ate"
-    )
-
-    ate = estimate.value
+    graph = build_graph()
+
+    with span("build_model", profile=True):
+        model = CausalModel(
+            data      = df,
+            treatment = 'treatment',
+            outcome   = 'outcome',
+            graph     = graph
+        )
+
+    # same data, graph and method as an earlier run means the same answer —
+    # reuse that fit instead of identifying and estimating again
+    with span("cache_lookup", profile=True):
+        key    = cache_key(data_path, graph, engine)
+        cached = load_fit(key) if use_cache else None
+
+    if cached is not None:
+        print(f"Loaded cached fit {key} from {cache_dir}/")
+        identified_estimand = cached["estimand"]
+        estimate            = cached["estimate"]
+    else:
+        # identify how to isolate the causal effect — DoWhy uses the backdoor criterion,
+        # memoized by graph hash so only a changed graph searches again
+        with span("identify", profile=True):
+            identified_estimand = identify(model, graph, df.columns, use_cache=use_cache)
+        print(identified_estimand)
+
+        # propensity score stratification groups customers by their likelihood
+        # of being called via cellular — within each group they're comparable,
+        # so the remaining difference in subscription rates is genuinely causal
+        with span("estimate", profile=True, engine=engine):
+            if engine == "native":
+                # same estimator on plain arrays — fits the propensity model once and
+                # aggregates strata with bincount instead of going through DoWhy
+                estimate = estimate_ate(df[confounders], df['treatment'], df['outcome'])
+            else:
+                estimate = model.estimate_effect(
+                    identified_estimand,
+                    method_name  = method,
+                    target_units = "ate"
+                )
+
+        save_fit(key, describe_fit(df, data_path, engine, estimate), identified_estimand, estimate)
+        print(f"Cached fit {key} in {cache_dir}/")
+
+    ate = estimate["ate"] if engine == "native" else estimate.value
 
     print(f"\nAverage Treatment Effect (ATE) : {ate:.4f}")
     print(f"Raw difference (before)        : {raw_diff:.2%}")
     print(f"True causal effect (after)     : {ate:.2%}")
     print(f"Selection bias removed         : {raw_diff - ate:.2%}")
 
+    # resample the fitted strata so the simulator can show how uncertain the
+    # ATE and baseline rate are, not just their point values. The replicates
+    # only depend on the fit and the seed, so a cached fit whose replicates
+    # are already on disk keeps them
+    previous = read_results().get("estimate", {})
+    drawn    = previous.get("bootstrap", {})
+    if (cached is not None and previous.get("cache_key") == key and os.path.exists(replicates_path)
+            and (drawn.get("replicates"), drawn.get("seed")) == (bootstrap_replicates, bootstrap_seed)):
+        print(f"Reusing bootstrap replicates in {replicates_path}")
+        boot_ate = drawn["ate"]
+    else:
+        with span("bootstrap", profile=True, replicates=bootstrap_replicates):
+            if engine == "native":
+                strata = estimate["strata"]
+            else:
+                ps     = np.asarray(estimate.propensity_scores)
+                strata = assign_strata(ps, strata_edges(ps, df['treatment'].to_numpy()))
+            boot = bootstrap_ate(strata, df['treatment'], df['outcome'], n_boot=bootstrap_replicates,
+                                 seed=bootstrap_seed)
+            write_replicates(boot["baseline"], boot["replicates"])
+        boot_ate = boot["ate"]
+
+    # publish the headline numbers for the dashboard
+    write_results("estimate", {
+        "engine":        engine,
+        "cache_key":     key,
+        "ate":           float(ate),
+        "treated_rate":  float(cellular_rate),
+        "baseline_rate": float(noncellular_rate),
+        "raw_diff":      float(raw_diff),
+        "bootstrap": {
+            "path":          replicates_path,
+            "replicates":    bootstrap_replicates,
+            "seed":          bootstrap_seed,
+            # point values the replicates were drawn around
+            "ate":           float(boot_ate),
+            "baseline_rate": float(noncellular_rate),
+        },
+    })
+
     return model, identified_estimand, estimate, raw_diff
 
 
+def run_channels(reference=reference_channel):
+    # every pairwise channel ATE from one multinomial propensity fit and one
+    # set of strata, instead of a binary model per contrast
+    df      = load_cleaned(data_path)
+    channel = contact_channel(df)
+    ref     = channel_labels.index(reference)
+
+    start = time.perf_counter()
+    with span("channels", profile=True, reference=reference):
+        fit = estimate_channel_ates(df[confounders], channel, df['outcome'], reference=ref,
+                                    n_boot=bootstrap_replicates, seed=bootstrap_seed)
+        write_channel_replicates(fit["replicates"])
+    seconds = time.perf_counter() - start
+
+    n    = np.bincount(channel, minlength=len(channel_labels))
+    rate = np.bincount(channel, weights=df['outcome'], minlength=len(channel_labels)) / n
+
+    print(f"\nContact channels vs {reference} ({fit['counts'].shape[0]} shared strata, {seconds:.2f}s)")
+    print(f"  {'channel':<10} {'customers':>10} {'raw rate':>9} {'ATE':>8} {'95% CI':>20}")
+    for k, label in enumerate(channel_labels):
+        lo, hi = fit["ci"][0, k, ref], fit["ci"][1, k, ref]
+        ci     = "" if k == ref else f"[{lo:+.4f}, {hi:+.4f}]"
+        print(f"  {label:<10} {n[k]:>10,} {rate[k]:>8.2%} {fit['ate'][k, ref]:>+8.4f} {ci:>20}")
+
+    write_results("channels", {
+        "labels":    channel_labels,
+        "reference": reference,
+        "customers": n.tolist(),
+        "raw_rate":  rate.tolist(),
+        "strata":    int(fit["counts"].shape[0]),
+        # ate[a][b]: effect of channel a over channel b, from the same strata
+        "ate":       fit["ate"].tolist(),
+        "ci_low":    fit["ci"][0].tolist(),
+        "ci_high":   fit["ci"][1].tolist(),
+        "bootstrap": {
+            "path":       channel_replicates_path,
+            "replicates": bootstrap_replicates,
+            "seed":       bootstrap_seed,
+        },
+        "seconds":   seconds,
+    })
+    return fit
+
+
+def run_comparison(identified_estimand, workers=1):
+    # every estimator on the same estimand, design matrix and propensity scores —
+    # the cheapest one that agrees with the rest is the one worth keeping
+    df = load_cleaned(data_path)
+    with span("compare", profile=True, workers=workers):
+        table = compare_estimators(df, build_graph(), identified_estimand, confounders, workers=workers)
+
+    print(f"\nEstimator comparison on {workers} worker(s) "
+          f"(shared design built in {table.attrs['design_seconds']:.2f}s, "
+          f"total {table.attrs['wall_seconds']:.2f}s)")
+    print(f"  {'estimator':<18} {'ATE':>8} {'runtime':>9} {'vs strat.':>10}")
+    for name, row in table.iterrows():
+        print(f"  {name:<18} {row['ate']:>8.4f} {row['seconds']:>8.2f}s {row['vs_stratification']:>+10.4f}")
+
+    write_results("comparison", {
+        "workers":    workers,
+        "estimators": {
+            name: {"method": estimator_methods[name], "ate": row['ate'], "seconds": row['seconds']}
+            for name, row in table.iterrows()
+        },
+    })
+    return table
+
+
 if __name__ == "__main__":
-    model, identified_estimand, estimate, raw_diff = build_causal_model()
+    parser = argparse.ArgumentParser(description="Estimate the causal effect of cellular contact")
+    parser.add_argument("--engine", choices=engines, default="dowhy",
+                        help="dowhy = DoWhy's estimator, native = first-party numpy version")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore any cached fit and recompute")
+    parser.add_argument("--compare", action="store_true",
+                        help="also run IPW, matching, linear regression and AIPW on the same estimand")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes for --compare (1 = serial)")
+    parser.add_argument("--channels", action="store_true",
+                        help="also estimate pairwise ATEs between cellular, telephone and unknown contact")
+    parser.add_argument("--reference", choices=channel_labels, default=reference_channel,
+                        help="channel the --channels ATEs are measured against")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    tracing.start_from_args(args)
+
+    with span("build_causal_model", engine=args.engine):
+        model, identified_estimand, estimate, raw_diff = build_causal_model(engine=args.engine, use_cache=not args.no_cache)
+
+    if args.compare:
+        run_comparison(identified_estimand, workers=args.workers)
+
+    if args.channels:
+        run_channels(reference=args.reference)
+
+    tracing.finish()
@@ -1,54 +1,295 @@
+import argparse
+import json
+import os
+from collections import Counter
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
+from data_io import column_dtypes, write_columnar, write_columnar_chunks
 
-input_path  = "data/bank-full.csv"
-output_path = "data/bank-full-cleaned.csv"
-def clean_data():
+input_path     = "data/bank-full.csv"
+output_path    = "data/bank-full-cleaned.csv"
+encodings_path = "data/encodings.json"
 
-    # load the dataset — it uses semicolons instead of commas as separators
-    df = pd.read_csv(input_path, sep=';')
-    print(f"Loaded {df.shape[0]} rows, {df.shape[1]} columns")
+# text columns whose 'unknown' entries get the most common known value
+impute_columns = ['job', 'education', 'contact', 'poutcome']
+
+# text columns that end up as integer codes — DoWhy needs everything numeric
+encode_columns = ['job', 'marital', 'education', 'contact', 'poutcome']
+
+month_map = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
+    'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
 
+# the whole cleaning transform as an ordered list of (step, arguments) —
+# every step is a single vectorized pandas/numpy operation, no per-row Python
+transform_spec = [
     # rename the target column to something more descriptive
-    df.rename(columns={'y': 'outcome'}, inplace=True)
+    ("rename",   {'y': 'outcome'}),
 
     # convert yes/no columns to 1/0 so the model can read them
-    for col in ['outcome', 'default', 'housing', 'loan']:
-        df[col] = df[col].map({'yes': 1, 'no': 0})
+    ("map",      {col: {'yes': 1, 'no': 0} for col in ['outcome', 'default', 'housing', 'loan']}),
 
     # create the treatment column — this is the core causal question
     # 1 = contacted via cellular, 0 = everything else
-    df['treatment'] = df['contact'].apply(lambda x: 1 if x == 'cellular' else 0)
+    # (must run before imputation, or 'unknown' contact would become cellular)
+    ("flag",     {'treatment': ('contact', 'cellular')}),
 
     # replace 'unknown' values with the most common value in each column
-    for col in ['job', 'education', 'contact', 'poutcome']:
-        most_common = df[col][df[col] != 'unknown'].mode()[0]
-        df[col] = df[col].replace('unknown', most_common)
+    ("impute",   impute_columns),
 
     # pdays uses -1 to mean "never contacted before" which is confusing
     # capture that as a proper binary column then clean up pdays itself
-    df['was_previously_contacted'] = df['pdays'].apply(lambda x: 0 if x == -1 else 1)
-    df['pdays'] = df['pdays'].replace(-1, 0)
+    ("sentinel", {'pdays': (-1, 0, 'was_previously_contacted')}),
 
     # convert month names to numbers
-    month_map = {
-        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
-        'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
-        'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-    }
-    df['month'] = df['month'].map(month_map)
+    ("map",      {'month': month_map}),
 
     # label encode remaining text columns — DoWhy needs everything numeric
-    le = LabelEncoder()
-    for col in ['job', 'marital', 'education', 'contact', 'poutcome']:
-        df[col] = le.fit_transform(df[col])
+    ("encode",   encode_columns),
+]
+
+
+def most_common(counts):
+    known = {value: n for value, n in counts.items() if value != 'unknown'}
+    top   = max(known.values())
+    # pandas' mode() returns ties in sorted order and we took the first
+    return min(value for value, n in known.items() if n == top)
+
+
+def gather_stats(chunks):
+    # value counts of the text columns are all the modes and encodings depend on,
+    # and they add up across chunks — so this works on one frame or a stream
+    counts = {col: Counter() for col in encode_columns}
+    rows   = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for col in encode_columns:
+            counts[col].update(chunk[col].value_counts().to_dict())
+
+    modes = {col: most_common(counts[col]) for col in impute_columns}
+
+    # LabelEncoder codes are positions in the sorted unique values, so the
+    # vocabulary is the sorted set left after 'unknown' has been filled in
+    vocab = {}
+    for col in encode_columns:
+        values = set(counts[col])
+        if col in modes and 'unknown' in values:
+            values = (values - {'unknown'}) | {modes[col]}
+        vocab[col] = sorted(values)
+
+    # categories a later batch brings in that this fit never saw are
+    # encoded as the column's most common value, same as 'unknown'
+    fallback = {col: modes.get(col) or most_common(counts[col]) for col in encode_columns}
+
+    encodings = {"modes": modes, "vocab": vocab, "fallback": fallback}
+    return encodings, rows
+
+
+def save_encodings(encodings, rows, source, path=encodings_path):
+    # the version only moves when the fitted modes/vocabularies actually change,
+    # so batches encoded under the same version share the same integer codes
+    version = 1
+    if os.path.exists(path):
+        previous = load_encodings(path)
+        same     = all(previous[key] == encodings[key] for key in ("modes", "vocab", "fallback"))
+        version  = previous["version"] if same else previous["version"] + 1
+
+    with open(path, 'w') as f:
+        json.dump({"version": version, "fitted_on": source, "rows": rows, **encodings}, f, indent=2)
+    return version
+
+
+def load_encodings(path=encodings_path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def unseen_values(df, encodings):
+    # per column, how many rows hold a category outside the saved vocabulary
+    unseen = {}
+    for col in encode_columns:
+        if col not in df:
+            continue
+        known = set(encodings["vocab"][col]) | ({'unknown'} if col in encodings["modes"] else set())
+        count = int((~df[col].isin(known)).sum())
+        if count:
+            unseen[col] = count
+    return unseen
+
+
+def lookup(values, mapping, missing=np.nan):
+    # hash the column once with factorize, translate only its few distinct
+    # values, then gather — the result of .map(mapping) without a dict lookup per row
+    codes, uniques = pd.factorize(values)
+    table = [mapping.get(value, missing) for value in uniques]
+    if (codes < 0).any():
+        # factorize marks missing input as -1, which now picks this slot
+        table.append(missing)
+    return np.asarray(table)[codes]
+
+
+def transform(df, encodings):
+    # columns a batch doesn't have are skipped, so files of customers not yet
+    # called (no 'y', no 'contact') go through the same steps as the training data
+    df    = df.copy()
+    modes = encodings["modes"]
+    vocab = encodings["vocab"]
+
+    for step, args in transform_spec:
+        if step == "rename":
+            df = df.rename(columns=args)
+
+        elif step == "map":
+            # these columns have no fallback category — an unmapped yes/no or
+            # month would only surface later as a failed integer downcast
+            for col, mapping in args.items():
+                if col not in df:
+                    continue
+                mapped   = lookup(df[col], mapping)
+                unmapped = pd.isna(mapped)
+                if unmapped.any():
+                    values = sorted(df[col][unmapped].astype(str).unique())
+                    raise ValueError(f"{int(unmapped.sum())} value(s) in {col!r} outside {sorted(mapping)}: {values}")
+                df[col] = mapped
+
+        elif step == "flag":
+            # 1 where the source column equals the value, 0 everywhere else
+            for new_col, (col, value) in args.items():
+                if col in df:
+                    df[new_col] = (df[col] == value).astype('int64')
+
+        elif step == "impute":
+            for col in args:
+                if col in df:
+                    df[col] = df[col].mask(df[col] == 'unknown', modes[col])
+
+        elif step == "sentinel":
+            # the flag is 0 where the sentinel appears, then the sentinel is replaced
+            for col, (sentinel, fill, flag_col) in args.items():
+                if col not in df:
+                    continue
+                is_sentinel   = df[col] == sentinel
+                df[flag_col]  = (~is_sentinel).astype('int64')
+                df[col]       = df[col].mask(is_sentinel, fill)
+
+        elif step == "encode":
+            # categorical codes against the fixed vocabulary from gather_stats —
+            # the same integers LabelEncoder gives, without re-sorting per column
+            # (anything outside the vocabulary gets its column's fallback code)
+            for col in [col for col in args if col in df]:
+                codes   = {value: code for code, value in enumerate(vocab[col])}
+                df[col] = lookup(df[col], codes, missing=codes[encodings["fallback"][col]])
+
+        else:
+            raise ValueError(f"unknown transform step {step!r}")
+
+    return df
+
+
+def feather_path(target):
+    return os.path.splitext(target)[0] + ".feather"
+
+
+def resolve_target(source, target, apply):
+    # an applied batch is a new file, never the training data: by default it
+    # lands next to its input as <name>-cleaned.csv
+    if not apply:
+        return output_path if target is None else target
+    if target is None:
+        target = os.path.splitext(source)[0] + "-cleaned.csv"
+    if os.path.abspath(target) == os.path.abspath(output_path):
+        raise ValueError(f"apply mode would overwrite the training data at {output_path}; pass a different target")
+    return target
+
+
+def clean_data(source=input_path, target=None, apply=False):
+    target = resolve_target(source, target, apply)
+
+    # load the dataset — it uses semicolons instead of commas as separators
+    df = pd.read_csv(source, sep=';')
+    print(f"Loaded {df.shape[0]} rows, {df.shape[1]} columns")
+
+    if apply:
+        # encode a new batch with the saved vocabularies — no refit, so its
+        # codes line up with everything cleaned under the same version
+        encodings = load_encodings()
+        print(f"Using encodings v{encodings['version']} from {encodings_path}")
+        unseen = unseen_values(df, encodings)
+        if unseen:
+            print(f"Unseen categories mapped to fallback: {unseen}")
+    else:
+        encodings, rows = gather_stats([df])
+        version = save_encodings(encodings, rows, source)
+        print(f"Saved encodings v{version} to {encodings_path}")
+
+    df = transform(df, encodings)
 
     print(f"Cleaning done — {df.shape[0]} rows, {df.shape[1]} columns")
     print(f"Nulls: {df.isnull().sum().sum()} | Duplicates: {df.duplicated().sum()}")
 
-    df.to_csv(output_path, index=False)
-    print(f"Saved to {output_path}")
+    df.to_csv(target, index=False)
+    print(f"Saved to {target}")
+
+    # typed binary copy for the later stages — much faster to load than the CSV
+    write_columnar(df, target, feather_path(target))
+    print(f"Saved to {feather_path(target)}")
+
+
+def clean_data_streaming(chunksize=500_000, source=input_path, target=None, apply=False):
+    # same cleaning for exports too big for memory: one pass to learn the modes
+    # and vocabularies, a second to transform and append chunk by chunk
+    # (with apply=True the saved encodings are used and pass 1 is skipped)
+    target = resolve_target(source, target, apply)
+
+    if apply:
+        encodings = load_encodings()
+        print(f"Using encodings v{encodings['version']} from {encodings_path}")
+    else:
+        # pass 1 only needs the text columns
+        chunks = pd.read_csv(source, sep=';', usecols=encode_columns, chunksize=chunksize)
+        encodings, rows = gather_stats(chunks)
+        version = save_encodings(encodings, rows, source)
+        print(f"Pass 1 — scanned {rows} rows, modes: {encodings['modes']}")
+        print(f"Saved encodings v{version} to {encodings_path}")
+
+    rows, nulls, unseen = 0, 0, Counter()
+    for i, chunk in enumerate(pd.read_csv(source, sep=';', chunksize=chunksize)):
+        if apply:
+            unseen.update(unseen_values(chunk, encodings))
+        chunk  = transform(chunk, encodings)
+        rows  += len(chunk)
+        nulls += chunk.isnull().sum().sum()
+        chunk.to_csv(target, index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+
+    # duplicates would need every row in memory, so only nulls are checked here
+    print(f"Pass 2 — cleaned {rows} rows | Nulls: {nulls}")
+    if unseen:
+        print(f"Unseen categories mapped to fallback: {dict(unseen)}")
+    print(f"Saved to {target}")
+
+    # typed binary copy, streamed back from the finished CSV
+    write_columnar_chunks(pd.read_csv(target, dtype=column_dtypes, chunksize=chunksize), target, feather_path(target))
+    print(f"Saved to {feather_path(target)}")
 
 
 if __name__ == "__main__":
-    clean_data()
+    parser = argparse.ArgumentParser(description="Clean and encode the raw UCI bank marketing file")
+    parser.add_argument("--input", default=input_path, help="semicolon-separated raw file")
+    parser.add_argument("--output", default=None,
+                        help=f"cleaned CSV to write (default: {output_path}, or <input>-cleaned.csv with --apply)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream the input this many rows at a time (default: load it all)")
+    parser.add_argument("--apply", action="store_true",
+                        help=f"encode with the saved {encodings_path} instead of refitting")
+    args = parser.parse_args()
+    try:
+        args.output = resolve_target(args.input, args.output, args.apply)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.chunksize:
+        clean_data_streaming(args.chunksize, args.input, args.output, apply=args.apply)
+    else:
+        clean_data(args.input, args.output, apply=args.apply)
@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from dowhy import CausalModel
+from estimators import fit_propensity
+import warnings
+warnings.filterwarnings('ignore')
+
+# runs several DoWhy estimators on one identified estimand side by side.
+# the design matrix and the propensity scores are built once in the parent
+# and placed in shared memory — workers wrap that buffer in a DataFrame
+# without copying it, and the propensity-based estimators find the
+# "propensity_score" column already there, so none of them refit it
+
+estimator_methods = {
+    "stratification":    "backdoor.propensity_score_stratification",
+    "ipw":               "backdoor.propensity_score_weighting",
+    "matching":          "backdoor.propensity_score_matching",
+    "linear_regression": "backdoor.linear_regression",
+    "aipw":              "backdoor.doubly_robust",
+}
+
+# the column name DoWhy's propensity estimators look for before fitting their own
+propensity_column = "propensity_score"
+
+# filled once per process by _init_worker so tasks only carry a name
+_worker_state = {}
+
+
+class FittedPropensity:
+    # the shared propensity model, in the shape DoWhy's doubly robust estimator
+    # expects: its fit() is a no-op, and predict_proba puts the confounders
+    # back in the fitted order (DoWhy's adjustment set comes from a set)
+    def __init__(self, model, columns):
+        self.model   = model
+        self.columns = columns
+
+    def fit(self, X, y):
+        return self
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(np.asarray(X[self.columns], dtype=float))
+
+
+def share_design(df, confounders):
+    # every column the graph needs plus the fitted propensity score, as one
+    # float64 block in a named shared-memory segment
+    ps_model, ps = fit_propensity(df[confounders].to_numpy(dtype=float), df['treatment'].to_numpy())
+    design = df.assign(**{propensity_column: ps})
+    values = design.to_numpy(dtype=np.float64)
+
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+    return shm, (shm.name, values.shape, list(design.columns)), FittedPropensity(ps_model, confounders)
+
+
+def attach_design(spec):
+    name, shape, columns = spec
+    shm   = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    return shm, pd.DataFrame(block, columns=columns, copy=False)
+
+
+def _init_worker(spec, graph, identified_estimand, propensity):
+    # the segment handle is kept so the mapping outlives this function
+    _worker_state['shm'], _worker_state['df'] = attach_design(spec)
+    _worker_state['graph']      = graph
+    _worker_state['estimand']   = identified_estimand
+    _worker_state['propensity'] = propensity
+
+
+def _run_estimator(name):
+    # a shallow copy per task — some estimators add or clip columns on the
+    # frame they're given, which must not leak into the next task
+    df    = _worker_state['df'].copy(deep=False)
+    model = CausalModel(data=df, treatment='treatment', outcome='outcome', graph=_worker_state['graph'])
+
+    # the doubly robust estimator asks its propensity model for scores
+    # directly instead of reading the column, so it gets the shared one
+    params = {"init_params": {"propensity_score_model": _worker_state['propensity']}} if name == "aipw" else None
+
+    # no effect modifiers: every estimator answers the same population-ATE
+    # question (and DoWhy's doubly robust estimator doesn't support them)
+    start    = time.perf_counter()
+    estimate = model.estimate_effect(
+        _worker_state['estimand'],
+        method_name      = estimator_methods[name],
+        target_units     = "ate",
+        effect_modifiers = [],
+        method_params    = params
+    )
+    return name, float(estimate.value), time.perf_counter() - start
+
+
+def compare_estimators(df, graph, identified_estimand, confounders, workers=1, names=None):
+    names = list(estimator_methods) if names is None else names
+
+    start                 = time.perf_counter()
+    shm, spec, propensity = share_design(df[list(graph.nodes)], confounders)
+    shared                = time.perf_counter() - start
+
+    try:
+        if workers == 1:
+            _init_worker(spec, graph, identified_estimand, propensity)
+            results = [_run_estimator(name) for name in names]
+        else:
+            with ProcessPoolExecutor(
+                max_workers = min(workers, len(names)),
+                initializer = _init_worker,
+                initargs    = (spec, graph, identified_estimand, propensity)
+            ) as pool:
+                results = list(pool.map(_run_estimator, names))
+    finally:
+        _worker_state.clear()
+        shm.close()
+        shm.unlink()
+
+    table = pd.DataFrame(results, columns=["estimator", "ate", "seconds"]).set_index("estimator")
+    table["vs_stratification"] = table["ate"] - table.loc["stratification", "ate"] if "stratification" in table.index else np.nan
+    table.attrs["design_seconds"] = shared
+    table.attrs["wall_seconds"]   = time.perf_counter() - start
+    return table
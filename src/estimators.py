@@ -0,0 +1,431 @@
+import numpy as np
+from scipy.stats import norm, rankdata
+from sklearn.linear_model import LogisticRegression
+
+# first-party version of DoWhy's backdoor.propensity_score_stratification
+# works straight on numpy arrays, so the propensity model is fit once and
+# every re-estimation after that is a handful of bincount calls
+
+clipping_threshold = 10
+
+
+def fit_propensity(X, t):
+    # same default LogisticRegression DoWhy uses, so the scores line up
+    ps_model = LogisticRegression()
+    ps_model.fit(X, t)
+    return ps_model, ps_model.predict_proba(X)[:, 1]
+
+
+def stratum_sums(strata, t, y, weights=None, minlength=0):
+    # per-stratum treated/control counts and outcome sums in one pass each
+    w  = np.ones(len(t)) if weights is None else weights
+    wt = w * t
+    wc = w - wt
+    return (
+        np.bincount(strata, weights=wt,     minlength=minlength),
+        np.bincount(strata, weights=wc,     minlength=minlength),
+        np.bincount(strata, weights=wt * y, minlength=minlength),
+        np.bincount(strata, weights=wc * y, minlength=minlength),
+    )
+
+
+def stratum_terms(n_t, n_c, y_t, y_c, clip=clipping_threshold):
+    # strata without more than `clip` treated AND control units are thrown away,
+    # the rest are weighted by their total population — exactly DoWhy's "ate" rule.
+    # Returns each stratum's weighted effect and weight, elementwise
+    keep = np.minimum(n_t, n_c) > clip
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effect = np.where(keep, y_t / n_t - y_c / n_c, 0.0)
+    size = np.where(keep, n_t + n_c, 0.0)
+    return effect * size, size
+
+
+def ate_from_sums(n_t, n_c, y_t, y_c, clip=clipping_threshold):
+    # works on the last axis, so a (replicates, strata) batch gives one ATE per row
+    total, weight = stratum_terms(n_t, n_c, y_t, y_c, clip)
+    return total.sum(axis=-1) / weight.sum(axis=-1)
+
+
+def strata_edges(ps, t, clip=clipping_threshold):
+    # DoWhy's "auto" rule: start at n / (2 * clip) rank-based strata and halve
+    # until at least half of them keep enough treated and control units
+    n          = len(ps)
+    ranks      = rankdata(ps)
+    num_strata = 0.5 * n / clip
+
+    while True:
+        labels   = np.round(ranks / n * num_strata).astype(np.int64)
+        n_t, n_c = np.bincount(labels, weights=t), np.bincount(labels, weights=1 - t)
+        if (np.minimum(n_t, n_c) > clip).sum() >= 0.5 * num_strata:
+            break
+        num_strata = int(num_strata / 2)
+        if num_strata < 2:
+            raise ValueError("Not enough data to generate at least two strata")
+
+    # turn the rank labels into propensity cut points — the lowest score of each
+    # stratum after the first — so any sample can be binned with np.digitize
+    lowest = np.full(labels.max() + 1, np.inf)
+    np.minimum.at(lowest, labels, ps)
+    return lowest[np.unique(labels)[1:]]
+
+
+def assign_strata(ps, edges):
+    return np.digitize(ps, edges)
+
+
+def stratified_ate(strata, t, y, weights=None, clip=clipping_threshold):
+    return ate_from_sums(*stratum_sums(strata, t, y, weights), clip=clip)
+
+
+def estimate_ate(X, t, y, clip=clipping_threshold):
+    columns = [str(col) for col in X.columns] if hasattr(X, "columns") else None
+    X = np.asarray(X, dtype=float)
+    t = np.asarray(t, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    ps_model, ps = fit_propensity(X, t)
+    edges        = strata_edges(ps, t, clip)
+    strata       = assign_strata(ps, edges)
+
+    return {
+        "ate":       stratified_ate(strata, t, y, clip=clip),
+        "columns":   columns,
+        "coef":      ps_model.coef_[0],
+        "intercept": ps_model.intercept_[0],
+        "edges":     edges,
+        "ps":        ps,
+        "strata":    strata,
+        "ps_model":  ps_model,
+    }
+
+
+def cell_counts(strata, t, y, num_strata=None):
+    # with a binary outcome every row falls into one (stratum, treatment, outcome)
+    # cell, so the whole design collapses to a (strata, 2, 2) count table
+    num_strata = strata.max() + 1 if num_strata is None else num_strata
+    cells = (strata * 2 + np.asarray(t, dtype=np.int64)) * 2 + np.asarray(y, dtype=np.int64)
+    return np.bincount(cells, minlength=num_strata * 4).reshape(num_strata, 2, 2)
+
+
+def ate_from_cells(counts, clip=clipping_threshold):
+    # counts: (..., strata, 2, 2) indexed [stratum, treatment, outcome]
+    n_t = counts[..., 1, :].sum(axis=-1)
+    n_c = counts[..., 0, :].sum(axis=-1)
+    return ate_from_sums(n_t, n_c, counts[..., 1, 1], counts[..., 0, 1], clip=clip)
+
+
+def jackknife_ate(counts, clip=clipping_threshold):
+    # leave-one-out ATE for a row in each cell — dropping a row only touches its
+    # own stratum, so every cell's value is the full total with one stratum redone
+    n_t = counts[:, 1, :].sum(axis=-1).astype(float)
+    n_c = counts[:, 0, :].sum(axis=-1).astype(float)
+    y_t = counts[:, 1, 1].astype(float)
+    y_c = counts[:, 0, 1].astype(float)
+
+    # same per-stratum rule as ate_from_sums; calling that on every
+    # leave-one-out vector would cost strata x strata memory
+    total, weight = stratum_terms(n_t, n_c, y_t, y_c, clip)
+
+    # broadcast the removed row's treatment/outcome over a (strata, 2, 2) grid
+    drop_t = np.array([0, 1])[None, :, None]
+    drop_y = np.array([0, 1])[None, None, :]
+    new_total, new_weight = stratum_terms(
+        n_t[:, None, None] - drop_t,
+        n_c[:, None, None] - (1 - drop_t),
+        y_t[:, None, None] - drop_t * drop_y,
+        y_c[:, None, None] - (1 - drop_t) * drop_y,
+        clip,
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta = (
+            (total.sum() - total[:, None, None] + new_total)
+            / (weight.sum() - weight[:, None, None] + new_weight)
+        )
+    return theta
+
+
+def bootstrap_ate(strata, t, y, n_boot=2000, seed=None, scheme="multinomial", alpha=0.05, clip=clipping_threshold):
+    # the propensity model and strata stay fixed — each replicate is only a
+    # reweighting of the cells, drawn for all replicates in one call
+    if scheme not in ("multinomial", "poisson"):
+        raise ValueError(f"scheme must be 'multinomial' or 'poisson', got {scheme!r}")
+
+    rng    = np.random.default_rng(seed)
+    counts = cell_counts(strata, t, y)
+    flat   = counts.ravel()
+    n      = flat.sum()
+
+    if scheme == "multinomial":
+        draws = rng.multinomial(n, flat / n, size=n_boot)
+    else:
+        draws = rng.poisson(flat, size=(n_boot, flat.size))
+
+    draws      = draws.reshape((n_boot,) + counts.shape)
+    theta_hat  = ate_from_cells(counts, clip)
+    replicates = ate_from_cells(draws, clip)
+
+    # the control group's subscription rate in each replicate, drawn jointly
+    # with the ATE so downstream simulations keep their correlation
+    control  = draws[:, :, 0, :].sum(axis=1)
+    baseline = control[:, 1] / control.sum(axis=1)
+
+    lo, hi     = alpha / 2, 1 - alpha / 2
+    percentile = np.quantile(replicates, [lo, hi])
+
+    # BCa: bias from the share of replicates below the estimate,
+    # acceleration from the count-weighted jackknife skewness
+    z0    = norm.ppf(np.clip((replicates < theta_hat).mean(), 1 / n_boot, 1 - 1 / n_boot))
+    jack  = jackknife_ate(counts, clip)
+    used  = counts > 0
+    w     = counts[used]
+    dev   = np.average(jack[used], weights=w) - jack[used]
+    accel = (w * dev ** 3).sum() / (6 * ((w * dev ** 2).sum()) ** 1.5)
+
+    z      = norm.ppf([lo, hi])
+    levels = norm.cdf(z0 + (z0 + z) / (1 - accel * (z0 + z)))
+    bca    = np.quantile(replicates, levels)
+
+    return {
+        "ate":           theta_hat,
+        "replicates":    replicates,
+        "baseline":      baseline,
+        "se":            replicates.std(ddof=1),
+        "percentile_ci": tuple(percentile),
+        "bca_ci":        tuple(bca),
+    }
+
+
+def placebo_ate(strata, t, y, n_perm=10000, seed=None, batch=1000, clip=clipping_threshold):
+    # permuting the treatment breaks any link with the outcome, so the fitted
+    # strata are reused as-is and each permutation only changes who is "treated"
+    rng = np.random.default_rng(seed)
+
+    # a permutation only matters through how many treated land in each
+    # (stratum, outcome) cell — for a uniform permutation those counts are
+    # multivariate hypergeometric, so they are drawn directly per cell instead
+    # of shuffling all N rows
+    counts  = cell_counts(strata, t, y)
+    cells   = counts.sum(axis=1)
+    treated = int(counts[:, 1, :].sum())
+    size    = cells.sum(axis=1).astype(float)
+    y_total = cells[:, 1].astype(float)
+
+    def ate_for(treated_cells):
+        n_t = treated_cells.sum(axis=-1).astype(float)
+        y_t = treated_cells[..., 1].astype(float)
+        return ate_from_sums(n_t, size - n_t, y_t, y_total - y_t, clip=clip)
+
+    observed = ate_for(counts[:, 1, :])
+
+    null = np.empty(n_perm)
+    for lo in range(0, n_perm, batch):
+        k     = min(batch, n_perm - lo)
+        draws = rng.multivariate_hypergeometric(cells.ravel(), treated, size=k, method="count")
+        null[lo:lo + k] = ate_for(draws.reshape((k,) + cells.shape))
+
+    # two-sided permutation p-value, counting the observed assignment itself
+    p_value = (1 + (np.abs(null) >= abs(observed)).sum()) / (n_perm + 1)
+
+    return {
+        "ate":        observed,
+        "null":       null,
+        "new_effect": null.mean(),
+        "p_value":    p_value,
+    }
+
+
+def design_matrix(X, reserved=1):
+    # one float32 copy of the covariates with `reserved` spare columns at the
+    # end — the refuters below write into those slots instead of copying the
+    # data, so every simulation reuses the same block of memory
+    X      = np.asarray(X)
+    design = np.zeros((X.shape[0], X.shape[1] + reserved), dtype=np.float32)
+    design[:, :X.shape[1]] = X
+    return design
+
+
+def refit_propensity(design, t, coef, intercept, weights=None, max_steps=10, tol=1e-8, chunk=1 << 16):
+    # Newton/IRLS refit of the propensity model — same objective as the
+    # default LogisticRegression (log loss + L2 with C=1, intercept
+    # unpenalised), warm-started from a previous fit (zero for any reserved
+    # column). The float32 design is read in row chunks and the k x k system
+    # is solved in float64, so memory stays flat however many refits run.
+    n, k = design.shape
+    w    = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    beta = np.zeros(k + 1)
+    beta[:len(coef)] = coef
+    beta[-1]         = intercept
+    penalty = np.append(np.ones(k), 0.0)
+
+    for _ in range(max_steps):
+        grad = penalty * beta
+        hess = np.diag(penalty)
+        for lo in range(0, n, chunk):
+            X  = np.hstack([design[lo:lo + chunk], np.ones((min(chunk, n - lo), 1), dtype=np.float32)]).astype(float)
+            p  = 1 / (1 + np.exp(-(X @ beta)))
+            wc = w[lo:lo + chunk]
+            grad += X.T @ ((p - t[lo:lo + chunk]) * wc)
+            hess += (X * (p * (1 - p) * wc)[:, None]).T @ X
+
+        # balance sits in the thousands next to 0/1 flags — solve the
+        # diagonally rescaled system so the step stays accurate
+        scale = 1 / np.sqrt(np.maximum(np.diag(hess), 1e-12))
+        step  = scale * np.linalg.solve(hess * np.outer(scale, scale), grad * scale)
+        beta -= step
+        if np.abs(step).max() < tol:
+            break
+
+    ps = np.empty(n)
+    for lo in range(0, n, chunk):
+        ps[lo:lo + chunk] = 1 / (1 + np.exp(-(design[lo:lo + chunk].astype(float) @ beta[:-1] + beta[-1])))
+    return beta[:-1], beta[-1], ps
+
+
+def refit_ate(design, t, y, coef, intercept, weights=None, clip=clipping_threshold):
+    _, _, ps = refit_propensity(design, t, coef, intercept, weights)
+
+    # strata are cut on the rows in the sample, then every row is binned —
+    # rows outside it carry zero weight in the sums
+    keep   = slice(None) if weights is None else weights > 0
+    strata = assign_strata(ps, strata_edges(ps[keep], t[keep], clip))
+    return stratified_ate(strata, t, y, weights=weights, clip=clip)
+
+
+def refit_reference_ate(design, t, y, coef, intercept, clip=clipping_threshold):
+    # the same Newton refit on the unperturbed design (reserved columns left at
+    # zero). It lands on a slightly different optimum than the lbfgs fit behind
+    # estimate_ate, so random_cause_ate and subset_ate are compared against
+    # this value rather than the lbfgs ATE, or the solver gap would read as a shift
+    return refit_ate(design, np.asarray(t, dtype=float), np.asarray(y, dtype=float), coef, intercept, clip=clip)
+
+
+def random_cause_ate(design, t, y, coef, intercept, n_sims=20, seed=None, clip=clipping_threshold):
+    # native "add a random common cause": each simulation draws a standard
+    # normal column into the design's reserved last slot and re-estimates
+    rng = np.random.default_rng(seed)
+    t   = np.asarray(t, dtype=float)
+    y   = np.asarray(y, dtype=float)
+
+    effects = np.empty(n_sims)
+    for i in range(n_sims):
+        design[:, -1] = rng.standard_normal(len(t), dtype=np.float32)
+        effects[i]    = refit_ate(design, t, y, coef, intercept, clip=clip)
+    design[:, -1] = 0
+    return effects
+
+
+def subset_ate(design, t, y, coef, intercept, fraction=0.9, n_sims=20, seed=None, clip=clipping_threshold):
+    # native "use a subset of data": a random `fraction` of rows is kept by a
+    # boolean mask passed as sample weights, so the design is never copied
+    rng  = np.random.default_rng(seed)
+    t    = np.asarray(t, dtype=float)
+    y    = np.asarray(y, dtype=float)
+    n    = len(t)
+    size = int(round(fraction * n))
+
+    effects = np.empty(n_sims)
+    mask    = np.zeros(n, dtype=bool)
+    for i in range(n_sims):
+        mask[:] = False
+        mask[rng.choice(n, size, replace=False)] = True
+        effects[i] = refit_ate(design, t, y, coef, intercept, weights=mask.astype(float), clip=clip)
+    return effects
+
+
+# ---- categorical treatments ----
+#
+# one multinomial propensity model over K channels instead of a binary model
+# per contrast. Customers are stratified jointly on the log-odds of every
+# channel against the reference, log(e_k / e_ref) — within a stratum all K
+# generalized propensity scores are roughly constant, so every pairwise
+# contrast is read off the same strata and the same (strata, K, 2) cell table
+
+
+def fit_multinomial_propensity(X, channel):
+    # the same default LogisticRegression as fit_propensity — with more than
+    # two classes its lbfgs solver fits the multinomial (softmax) model
+    ps_model = LogisticRegression()
+    ps_model.fit(X, channel)
+    return ps_model, ps_model.predict_proba(X)
+
+
+def channel_strata(ps, channel, reference=0, clip=clipping_threshold):
+    # quantile bins on each log-odds axis. Like strata_edges, start from
+    # n / (2 * clip) strata in all (so n ** (1 / (K - 1)) per axis) and halve the
+    # bins per axis until at least half of the occupied strata keep more than
+    # `clip` units of every channel
+    k      = ps.shape[1]
+    others = [c for c in range(k) if c != reference]
+    logit  = np.log(ps[:, others]) - np.log(ps[:, [reference]])
+
+    bins = max(2, int((0.5 * len(ps) / clip) ** (1 / len(others))))
+    while True:
+        cuts   = [np.unique(np.quantile(logit[:, j], np.linspace(0, 1, bins + 1)[1:-1])) for j in range(len(others))]
+        codes  = [np.digitize(logit[:, j], cuts[j]) for j in range(len(others))]
+        strata = np.ravel_multi_index(codes, (bins,) * len(others))
+        n      = np.bincount(strata * k + channel, minlength=bins ** len(others) * k).reshape(-1, k)
+        used   = n.sum(axis=1) > 0
+        if (n[used].min(axis=1) > clip).sum() >= 0.5 * used.sum():
+            break
+        bins //= 2
+        if bins < 2:
+            raise ValueError("Not enough data to generate at least two strata for every channel")
+
+    # renumber so strata are 0..S-1 with no empty ones
+    _, strata = np.unique(strata, return_inverse=True)
+    return strata, cuts
+
+
+def channel_cells(strata, channel, y, k, num_strata=None):
+    # (strata, K, 2) counts indexed [stratum, channel, outcome]
+    num_strata = strata.max() + 1 if num_strata is None else num_strata
+    cells = (strata * k + np.asarray(channel, dtype=np.int64)) * 2 + np.asarray(y, dtype=np.int64)
+    return np.bincount(cells, minlength=num_strata * k * 2).reshape(num_strata, k, 2)
+
+
+def contrast_ates(counts, clip=clipping_threshold):
+    # counts: (..., strata, K, 2) -> (..., K, K) with [a, b] the ATE of channel a
+    # over channel b. Each pair keeps the strata with more than `clip` units of
+    # both channels and weights them by the stratum's whole population — for
+    # K = 2 this is exactly ate_from_sums
+    n    = counts.sum(axis=-1).astype(float)
+    size = n.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = counts[..., 1] / n
+
+    keep   = np.minimum(n[..., :, None], n[..., None, :]) > clip
+    effect = np.where(keep, rate[..., :, None] - rate[..., None, :], 0.0)
+    weight = np.where(keep, size[..., None, None], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (effect * weight).sum(axis=-3) / weight.sum(axis=-3)
+
+
+def estimate_channel_ates(X, channel, y, reference=0, n_boot=2000, seed=None, alpha=0.05, clip=clipping_threshold):
+    # every pairwise channel ATE from one multinomial fit, with multinomial
+    # bootstrap replicates of the cell table for all contrasts at once
+    columns = [str(col) for col in X.columns] if hasattr(X, "columns") else None
+    X       = np.asarray(X, dtype=float)
+    channel = np.asarray(channel, dtype=np.int64)
+    y       = np.asarray(y, dtype=np.int64)
+
+    ps_model, ps  = fit_multinomial_propensity(X, channel)
+    strata, cuts  = channel_strata(ps, channel, reference, clip=clip)
+    counts        = channel_cells(strata, channel, y, ps.shape[1])
+
+    rng        = np.random.default_rng(seed)
+    flat       = counts.ravel()
+    draws      = rng.multinomial(flat.sum(), flat / flat.sum(), size=n_boot).reshape((n_boot,) + counts.shape)
+    replicates = contrast_ates(draws, clip)
+
+    return {
+        "ate":        contrast_ates(counts, clip),
+        "replicates": replicates,
+        "ci":         np.quantile(replicates, [alpha / 2, 1 - alpha / 2], axis=0),
+        "columns":    columns,
+        "coef":       ps_model.coef_,
+        "intercept":  ps_model.intercept_,
+        "cuts":       cuts,
+        "ps":         ps,
+        "strata":     strata,
+        "counts":     counts,
+    }
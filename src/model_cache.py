@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import pickle
+from datetime import datetime, timezone
+from importlib.metadata import version
+
+import numpy as np
+from data_io import file_checksum
+from estimators import strata_edges
+
+# content-addressed store for fitted causal models: the key is a hash of the
+# dataset bytes, the graph edges and the estimation method, so a cached fit is
+# reused until one of those inputs actually changes
+cache_dir = "artifacts"
+method    = "backdoor.propensity_score_stratification"
+
+
+def cache_key(data_path, graph, engine, method=method):
+    parts = {
+        "data":       file_checksum(data_path),
+        "edges":      sorted([list(edge) for edge in graph.edges()]),
+        # the adjustment-set column order moves the propensity fit, so it is
+        # part of what the estimate depends on
+        "adjustment": list(graph.predecessors(graph.graph.get("treatment", "treatment"))),
+        "method":     method,
+        "engine":     engine,
+        # pickled DoWhy objects are only safe to reload under the same version
+        "dowhy":      version("dowhy"),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _path(key, suffix):
+    return os.path.join(cache_dir, key + suffix)
+
+
+def describe_fit(df, data_path, engine, estimate):
+    # the plain-JSON half of the cache, readable without importing DoWhy
+    # or unpickling anything
+    t = df['treatment'].to_numpy()
+    y = df['outcome'].to_numpy()
+
+    if engine == "native":
+        ate       = estimate["ate"]
+        ps_model  = estimate["ps_model"]
+        columns   = estimate["columns"]
+        edges     = estimate["edges"]
+    else:
+        ate       = estimate.value
+        ps_model  = estimate.estimator.propensity_score_model
+        columns   = list(ps_model.feature_names_in_)
+        edges     = strata_edges(np.asarray(estimate.propensity_scores), t)
+
+    treated_rate = y[t == 1].mean()
+    control_rate = y[t == 0].mean()
+
+    return {
+        "data_sha256":   file_checksum(data_path),
+        "method":        method,
+        "engine":        engine,
+        "ate":           float(ate),
+        "treated_rate":  float(treated_rate),
+        "control_rate":  float(control_rate),
+        "raw_diff":      float(treated_rate - control_rate),
+        "columns":       [str(col) for col in columns],
+        "coef":          ps_model.coef_[0].tolist(),
+        "intercept":     float(ps_model.intercept_[0]),
+        "strata_edges":  np.asarray(edges).tolist(),
+        "created":       datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def save_fit(key, summary, estimand, estimate):
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(_path(key, ".json"), 'w') as f:
+        json.dump({"key": key, **summary}, f, indent=2)
+    with open(_path(key, ".pkl"), 'wb') as f:
+        pickle.dump({"estimand": estimand, "estimate": estimate}, f)
+
+
+def load_fit(key, objects=True):
+    # returns None on a miss; objects=False skips the pickle (no DoWhy import)
+    if not os.path.exists(_path(key, ".json")) or (objects and not os.path.exists(_path(key, ".pkl"))):
+        return None
+
+    with open(_path(key, ".json")) as f:
+        fit = json.load(f)
+    if objects:
+        with open(_path(key, ".pkl"), 'rb') as f:
+            fit.update(pickle.load(f))
+    return fit
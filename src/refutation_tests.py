@@ -1,112 +1,442 @@
-import pandas as pd
-import networkx as nx
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+from scipy.stats import t as t_dist
 from dowhy import CausalModel
+from dowhy.causal_refuter import CausalRefutation, test_significance
+from dowhy.causal_refuters import (
+    refute_bootstrap,
+    refute_data_subset,
+    refute_placebo_treatment,
+    refute_random_common_cause,
+)
+from dowhy.causal_refuters.placebo_treatment_refuter import PlaceboType
+from dag import build_graph, common_causes, identify
+from data_io import load_cleaned
+from estimators import (bootstrap_ate, design_matrix, estimate_ate, placebo_ate, random_cause_ate, refit_reference_ate,
+                        subset_ate)
+from model_cache import cache_dir, cache_key, describe_fit, load_fit, method, save_fit
+from results import write_results
+from tracing import span
+import tracing
 import warnings
 warnings.filterwarnings('ignore')
 
-data_path    = "data/bank-full-cleaned.csv"
-original_ate = 0.0681
+data_path       = "data/bank-full-cleaned.csv"
+num_simulations = 20
+default_seed    = 42
+engines         = ["dowhy", "native"]
+
+# the native bootstrap and placebo reuse one fitted design, so thousands of
+# replicates/permutations cost less than DoWhy's 20 refits
+bootstrap_replicates  = 2000
+placebo_permutations  = 10000
+
+# same graph spec as causal_model.py, so the tests always check that model
+confounders = common_causes(build_graph())
+
+# pass/fail lines used by check_result: the placebo effect must land within
+# placebo_tolerance of zero, every other refuter within shift_tolerance
+# (as a share) of the original ATE
+placebo_tolerance = 0.01
+shift_tolerance   = 0.20
 
+# the native placebo has an exact permutation null, so it passes on that
+# instead: the real ATE has to beat all but placebo_alpha of the permutations
+placebo_alpha = 0.05
 
-def build_model(df):
-    # exact same graph as causal_model.py — must be identical for tests to be valid
-    graph = nx.DiGraph()
+# --adaptive runs simulations in batches and stops a refuter as soon as a
+# confidence interval for its mean effect sits entirely inside or outside
+# that pass region. The 99% level per look keeps the overall error near 5%
+# across the handful of looks a run takes. A refuter still undecided after
+# num_simulations is marginal, and it alone keeps going up to max_simulations.
+adaptive_batch      = 5
+adaptive_confidence = 0.99
+max_simulations     = 60
 
-    confounders = ['age', 'job', 'education', 'marital', 'balance', 'housing', 'loan', 'default']
-    for node in confounders:
-        graph.add_edge(node, 'treatment')
-        graph.add_edge(node, 'outcome')
+# every refuter is run one simulation at a time through DoWhy's functional API,
+# so the pool gets 4 x num_simulations small jobs instead of 4 long ones
+refuters = {
+    "placebo":      (refute_placebo_treatment,   {"treatment_names": ['treatment'], "placebo_type": PlaceboType.PERMUTE}),
+    "random_cause": (refute_random_common_cause, {}),
+    "subset":       (refute_data_subset,         {"subset_fraction": 0.9}),
+    "bootstrap":    (refute_bootstrap,           {}),
+}
 
-    graph.add_edge('poutcome', 'outcome')
-    graph.add_edge('was_previously_contacted', 'outcome')
-    graph.add_edge('treatment', 'outcome')
+refutation_types = {
+    "placebo":      "Refute: Use a Placebo Treatment",
+    "random_cause": "Refute: Add a random common cause",
+    "subset":       "Refute: Use a subset of data",
+    "bootstrap":    "Refute: Bootstrap Sample Dataset",
+}
 
-    return CausalModel(data=df, treatment='treatment', outcome='outcome', graph=graph)
+# filled once per process by _init_worker so tasks only carry (name, seed)
+_worker_state = {}
 
 
-def check_result(new_value, expect_zero=False):
+def build_model(df, graph=None):
+    graph = build_graph() if graph is None else graph
+    return CausalModel(data=df, treatment=graph.graph["treatment"], outcome=graph.graph["outcome"], graph=graph)
+
+
+def check_result(new_value, original_ate, expect_zero=False):
     # helper to print a quick pass/fail for each test
     if expect_zero:
-        passed = abs(new_value) < 0.01
+        passed = abs(new_value) < placebo_tolerance
         print(f"  new effect : {new_value:.4f}  (expected ~0)")
         print(f"  result     : {'PASSED' if passed else 'FAILED'}")
     else:
         shift  = abs(new_value - original_ate)
-        passed = shift < original_ate * 0.20
+        passed = shift < original_ate * shift_tolerance
         print(f"  new effect : {new_value:.4f}  (expected ~{original_ate:.4f})")
         print(f"  shift      : {shift:.4f}  ({(shift/original_ate)*100:.1f}%)")
         print(f"  result     : {'PASSED' if passed else 'FAILED'}")
+    return passed
+
+
+def pass_region(original_ate, expect_zero=False):
+    if expect_zero:
+        return -placebo_tolerance, placebo_tolerance
+    margin = abs(original_ate) * shift_tolerance
+    return original_ate - margin, original_ate + margin
+
+
+def verdict(samples, original_ate, expect_zero=False, confidence=adaptive_confidence):
+    # "pass" / "fail" once the t-interval for the mean effect clears the pass
+    # region's edges, "undecided" while it still straddles one
+    samples = np.asarray(samples)
+    if len(samples) < 2:
+        return "undecided"
+    half   = t_dist.ppf((1 + confidence) / 2, len(samples) - 1) * samples.std(ddof=1) / np.sqrt(len(samples))
+    lo, hi = samples.mean() - half, samples.mean() + half
+    low, high = pass_region(original_ate, expect_zero)
+    if low < lo and hi < high:
+        return "pass"
+    if hi < low or lo > high:
+        return "fail"
+    return "undecided"
+
+
+def simulation_seeds(seed, n_sims=num_simulations):
+    # one independent seed per (refuter, simulation) — derived from a single
+    # root seed so serial and parallel runs see exactly the same draws. Each
+    # refuter gets its own spawned stream, read in order, so simulation i of a
+    # refuter has the same seed whatever n_sims is: a fixed run and an
+    # adaptive run with any --max-simulations share their common prefix
+    streams = np.random.SeedSequence(seed).spawn(len(refuters))
+    return {
+        name: [int(s) for s in stream.generate_state(n_sims)]
+        for name, stream in zip(refuters, streams)
+    }
 
 
-def run_refutation_tests():
+def _init_worker(df, identified_estimand, estimate, trace=None):
+    _worker_state['df']       = df
+    _worker_state['estimand'] = identified_estimand
+    _worker_state['estimate'] = estimate
+
+    # a pool worker keeps its own trace and ships its spans back per task
+    _worker_state['trace'] = trace is not None
+    if trace is not None:
+        tracing.enable(**trace)
+
+
+def _run_simulation(task):
+    name, seed = task
+    refute_fn, kwargs = refuters[name]
+    with span(f"refute[{name}]", profile=True, seed=seed):
+        result = refute_fn(
+            data            = _worker_state['df'],
+            target_estimand = _worker_state['estimand'],
+            estimate        = _worker_state['estimate'],
+            num_simulations = 1,
+            random_state    = seed,
+            **kwargs
+        )
+    return result.new_effect, tracing.drain() if _worker_state['trace'] else []
+
+
+def run_simulations(df, identified_estimand, estimate, workers=1, seed=default_seed, n_sims=num_simulations, names=None):
+    names = list(refuters) if names is None else names
+    seeds = simulation_seeds(seed, n_sims)
+    tasks = [(name, s) for name in names for s in seeds[name]]
+
+    if workers == 1:
+        _init_worker(df, identified_estimand, estimate)
+        results = [_run_simulation(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers = workers,
+            initializer = _init_worker,
+            initargs    = (df, identified_estimand, estimate, tracing.options())
+        ) as pool:
+            results = list(pool.map(_run_simulation, tasks))
+
+    effects = [effect for effect, _ in results]
+    for _, spans in results:
+        tracing.adopt(spans)
+
+    # map keeps task order, so results can be split back per refuter
+    return {
+        name: np.array(effects[i * n_sims:(i + 1) * n_sims])
+        for i, name in enumerate(names)
+    }
+
+
+def run_adaptive(df, identified_estimand, estimate, workers=1, seed=default_seed, names=None,
+                 batch=adaptive_batch, max_sims=max_simulations):
+    # sequential version of run_simulations: every undecided refuter gets
+    # another batch per round, all rounds going through one pool
+    if batch < 1:
+        raise ValueError(f"batch must be at least 1, got {batch}")
+    if max_sims < max(2, batch):
+        raise ValueError(f"max_sims must be at least 2 and at least batch ({batch}), got {max_sims}")
+    names   = list(refuters) if names is None else names
+    seeds   = simulation_seeds(seed, max_sims)
+    samples = {name: [] for name in names}
+    status  = {}
+    active  = list(names)
+
+    pool = None
+    if workers == 1:
+        _init_worker(df, identified_estimand, estimate)
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers = workers,
+            initializer = _init_worker,
+            initargs    = (df, identified_estimand, estimate, tracing.options())
+        )
 
-    df    = pd.read_csv(data_path)
-    model = build_model(df)
+    try:
+        while active:
+            tasks   = [(name, s) for name in active for s in seeds[name][len(samples[name]):len(samples[name]) + batch]]
+            results = pool.map(_run_simulation, tasks) if pool else map(_run_simulation, tasks)
+            for (name, _), (effect, spans) in zip(tasks, results):
+                samples[name].append(effect)
+                tracing.adopt(spans)
 
-    identified_estimand = model.identify_effect(proceed_when_unidentifiable=True)
-    estimate = model.estimate_effect(
-        identified_estimand,
-        method_name  = "backdoor.propensity_score_stratification",
-        target_units = "ate"
-    )
+            for name in list(active):
+                n      = len(samples[name])
+                result = verdict(samples[name], estimate.value, expect_zero=(name == "placebo"))
+                if result != "undecided" or n >= max_sims:
+                    status[name] = {"verdict": result, "simulations": n, "marginal": n > num_simulations}
+                    active.remove(name)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
-    print(f"Original ATE: {estimate.value:.4f}")
-    print("Running 4 refutation tests — this takes a few minutes\n")
+    return {name: np.array(values) for name, values in samples.items()}, status
+
+
+def summarize(name, estimate_value, samples):
+    # same aggregation DoWhy does at the end of each refute_* function
+    refute = CausalRefutation(estimate_value, np.mean(samples), refutation_type=refutation_types[name])
+
+    # DoWhy's test only reads .value — the placebo distribution is tested
+    # against zero, everything else against the original ATE
+    reference = SimpleNamespace(value=0 if name == "placebo" else estimate_value)
+    refute.add_significance_test_results(test_significance(reference, samples))
+    return refute
+
+
+def run_refutation_tests(workers=1, seed=default_seed, engine="dowhy", adaptive=False, max_sims=max_simulations):
+
+    if engine not in engines:
+        raise ValueError(f"engine must be one of {engines}, got {engine!r}")
+    if adaptive and engine == "native":
+        raise ValueError("adaptive stopping only applies to the DoWhy refuters, not engine='native'")
+
+    with span("load", profile=True):
+        df = load_cleaned(data_path)
+    graph = build_graph()
+
+    if engine == "native":
+        # the native engine refutes its own fit and never touches DoWhy, so
+        # every test is measured against the native ATE rather than DoWhy's
+        with span("estimate", profile=True, engine="native"):
+            fit = estimate_ate(df[confounders], df['treatment'], df['outcome'])
+        original_ate = fit["ate"]
+    else:
+        # the DoWhy refuters perturb an existing DoWhy fit, so reuse the one
+        # causal_model.py cached for this data and graph when there is one
+        with span("cache_lookup", profile=True):
+            key    = cache_key(data_path, graph, "dowhy")
+            cached = load_fit(key)
+
+        if cached is not None:
+            print(f"Loaded cached fit {key} from {cache_dir}/")
+            identified_estimand = cached["estimand"]
+            estimate            = cached["estimate"]
+        else:
+            model = build_model(df, graph)
+            with span("identify", profile=True):
+                identified_estimand = identify(model, graph, df.columns)
+            with span("estimate", profile=True, engine="dowhy"):
+                estimate = model.estimate_effect(
+                    identified_estimand,
+                    method_name  = method,
+                    target_units = "ate"
+                )
+            save_fit(key, describe_fit(df, data_path, "dowhy", estimate), identified_estimand, estimate)
+        original_ate = estimate.value
+
+    print(f"Original ATE: {original_ate:.4f}")
+    budget = f"{adaptive_batch}-{max_sims} simulations (adaptive)" if adaptive else f"{num_simulations} simulations"
+    print(f"Running 4 refutation tests x {budget} on {workers} worker(s) (seed={seed})\n")
+
+    # the native engine swaps every DoWhy refuter (a DataFrame copy and a full
+    # refit per simulation) for the ones in estimators.py
+    native = list(refuters) if engine == "native" else []
+    names  = [name for name in refuters if name not in native]
+    values = {name: original_ate for name in refuters}
+
+    samples, status = {}, {}
+    if names and adaptive:
+        with span("simulations", workers=workers, adaptive=True):
+            samples, status = run_adaptive(df, identified_estimand, estimate, workers=workers, seed=seed,
+                                           names=names, max_sims=max_sims)
+        print("Adaptive stopping")
+        for name, state in status.items():
+            note = "  (marginal — ran past the usual budget)" if state["marginal"] else ""
+            print(f"  {name:<13}: {state['simulations']:>3} simulations, {state['verdict']}{note}")
+        used = sum(state["simulations"] for state in status.values())
+        print(f"  total        : {used} of {len(names) * num_simulations} fixed-mode simulations\n")
+    elif names:
+        with span("simulations", workers=workers, tasks=len(names) * num_simulations):
+            samples = run_simulations(df, identified_estimand, estimate, workers=workers, seed=seed, names=names)
+
+    if native:
+        with span("refute[placebo-native]", profile=True, permutations=placebo_permutations):
+            perm = placebo_ate(fit["strata"], df['treatment'], df['outcome'], n_perm=placebo_permutations, seed=seed)
+        samples["placebo"] = perm["null"]
+
+        with span("refute[bootstrap-native]", profile=True, replicates=bootstrap_replicates):
+            boot = bootstrap_ate(fit["strata"], df['treatment'], df['outcome'], n_boot=bootstrap_replicates, seed=seed)
+        samples["bootstrap"] = boot["replicates"]
+
+        # random cause and subset share one float32 design: the noise column is
+        # drawn into its reserved slot and subsets are row masks, and every
+        # propensity refit starts from the original coefficients. Both are
+        # measured against the same Newton refit of the unperturbed design
+        seeds     = simulation_seeds(seed)
+        design    = design_matrix(df[confounders])
+        reference = refit_reference_ate(design, df['treatment'], df['outcome'], fit["coef"], fit["intercept"])
+
+        with span("refute[random_cause-native]", profile=True, simulations=num_simulations):
+            samples["random_cause"] = random_cause_ate(design, df['treatment'], df['outcome'], fit["coef"], fit["intercept"],
+                                                       n_sims=num_simulations, seed=seeds["random_cause"][0])
+        values["random_cause"] = reference
+
+        with span("refute[subset-native]", profile=True, simulations=num_simulations):
+            samples["subset"] = subset_ate(design, df['treatment'], df['outcome'], fit["coef"], fit["intercept"],
+                                           fraction=refuters["subset"][1]["subset_fraction"],
+                                           n_sims=num_simulations, seed=seeds["subset"][0])
+        values["subset"] = reference
 
     # test 1: replace real treatment with random noise
     # if the model is genuine, the effect should collapse to near zero
     print("Test 1 — Placebo Treatment")
-    placebo = model.refute_estimate(
-        identified_estimand, estimate,
-        method_name="placebo_treatment_refuter",
-        placebo_type="permute",
-        num_simulations=20
-    )
+    placebo = summarize("placebo", values["placebo"], samples["placebo"])
     print(placebo)
-    check_result(placebo.new_effect, expect_zero=True)
+    if "placebo" in native:
+        # how often a random assignment beats the real one — should be tiny
+        print(f"  permutations : {placebo_permutations}  (null sd {perm['null'].std():.4f})")
+        print(f"  perm p-value : {perm['p_value']:.4f}  (real ATE vs permutation null)")
+        passed = {"placebo": perm["p_value"] < placebo_alpha}
+        print(f"  result       : {'PASSED' if passed['placebo'] else 'FAILED'}  (needs p < {placebo_alpha})")
+    else:
+        passed = {"placebo": check_result(placebo.new_effect, original_ate, expect_zero=True)}
 
     # test 2: add a completely fake random confounder
     # ATE should barely move if the causal structure is solid
     print("\nTest 2 — Random Common Cause")
-    random_cause = model.refute_estimate(
-        identified_estimand, estimate,
-        method_name="random_common_cause",
-        num_simulations=20
-    )
+    random_cause = summarize("random_cause", values["random_cause"], samples["random_cause"])
     print(random_cause)
-    check_result(random_cause.new_effect)
+    passed["random_cause"] = check_result(random_cause.new_effect, values["random_cause"])
 
     # test 3: drop 10% of the data at random and rerun
     # a stable finding shouldn't depend on any particular slice of rows
     print("\nTest 3 — Data Subset")
-    subset = model.refute_estimate(
-        identified_estimand, estimate,
-        method_name="data_subset_refuter",
-        subset_fraction=0.9,
-        num_simulations=20
-    )
+    subset = summarize("subset", values["subset"], samples["subset"])
     print(subset)
-    check_result(subset.new_effect)
+    passed["subset"] = check_result(subset.new_effect, values["subset"])
 
     # test 4: resample the data 20 times and check consistency
     # if the ATE stays stable across resamples, the finding is reliable
     print("\nTest 4 — Bootstrap")
-    bootstrap = model.refute_estimate(
-        identified_estimand, estimate,
-        method_name="bootstrap_refuter",
-        num_simulations=20
-    )
+    bootstrap = summarize("bootstrap", values["bootstrap"], samples["bootstrap"])
     print(bootstrap)
-    check_result(bootstrap.new_effect)
+    if "bootstrap" in native:
+        print(f"  replicates : {bootstrap_replicates}  (se {boot['se']:.4f})")
+        print(f"  95% CI     : percentile [{boot['percentile_ci'][0]:.4f}, {boot['percentile_ci'][1]:.4f}]"
+              f"  BCa [{boot['bca_ci'][0]:.4f}, {boot['bca_ci'][1]:.4f}]")
+    passed["bootstrap"] = check_result(bootstrap.new_effect, values["bootstrap"])
 
     print("\nSummary")
     print(f"  original ATE  : {original_ate:.4f}")
     print(f"  placebo       : {placebo.new_effect:.4f}  (should be ~0)")
-    print(f"  random cause  : {random_cause.new_effect:.4f}  (should be ~{original_ate:.4f})")
-    print(f"  data subset   : {subset.new_effect:.4f}  (should be ~{original_ate:.4f})")
-    print(f"  bootstrap     : {bootstrap.new_effect:.4f}  (should be ~{original_ate:.4f})")
+    print(f"  random cause  : {random_cause.new_effect:.4f}  (should be ~{values['random_cause']:.4f})")
+    print(f"  data subset   : {subset.new_effect:.4f}  (should be ~{values['subset']:.4f})")
+    print(f"  bootstrap     : {bootstrap.new_effect:.4f}  (should be ~{values['bootstrap']:.4f})")
     print("\np-value > 0.05 on all four tests = model is statistically robust")
 
+    refutations = {"placebo": placebo, "random_cause": random_cause, "subset": subset, "bootstrap": bootstrap}
+
+    tests = {
+        name: {
+            "new_effect":  float(refute.new_effect),
+            "p_value":     float(refute.refutation_result["p_value"]),
+            "expected":    0.0 if name == "placebo" else float(values[name]),
+            "simulations": status[name]["simulations"] if name in status else len(samples[name]),
+            "passed":      bool(passed[name]),
+        }
+        for name, refute in refutations.items()
+    }
+    if "placebo" in native:
+        # the exact test the verdict is based on; small means the real
+        # assignment is unlike any random one
+        tests["placebo"]["permutation_p_value"] = float(perm["p_value"])
+
+    # publish the scorecard for the dashboard — the placebo is expected to
+    # land on zero, the other three on the original ATE
+    write_results("refutations", {
+        "engine":          engine,
+        "seed":            seed,
+        "num_simulations": num_simulations,
+        "adaptive":        bool(status),
+        "original_ate":    float(original_ate),
+        "tests":           tests,
+    })
+
+    return refutations
+
 
 if __name__ == "__main__":
-    run_refutation_tests()
+    parser = argparse.ArgumentParser(description="Run the four DoWhy refutation tests")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes to spread the simulations over (1 = serial)")
+    parser.add_argument("--seed", type=int, default=default_seed,
+                        help="root seed the per-simulation seeds are derived from")
+    parser.add_argument("--engine", choices=engines, default="dowhy",
+                        help="native = numpy refuters on the fitted design instead of DoWhy's refit loop")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="run simulations in batches and stop each refuter once its verdict is clear")
+    parser.add_argument("--max-simulations", type=int, default=max_simulations,
+                        help="with --adaptive, cap for refuters still marginal after the usual budget")
+    tracing.add_arguments(parser)
+    args = parser.parse_args()
+    if args.adaptive and args.engine == "native":
+        parser.error("--adaptive only applies to the DoWhy refuters; the native ones are single closed-form passes")
+    if args.max_simulations < max(2, adaptive_batch):
+        parser.error(f"--max-simulations must be at least {max(2, adaptive_batch)} (one batch of "
+                     f"{adaptive_batch}), got {args.max_simulations}")
+    tracing.start_from_args(args)
+
+    with span("run_refutation_tests", engine=args.engine, workers=args.workers):
+        run_refutation_tests(workers=args.workers, seed=args.seed, engine=args.engine,
+                             adaptive=args.adaptive, max_sims=args.max_simulations)
+
+    tracing.finish()
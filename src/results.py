@@ -0,0 +1,56 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+# the results manifest is the hand-off between the pipeline and the dashboard:
+# causal_model.py writes the "estimate" section, refutation_tests.py writes
+# "refutations", and app.py only ever reads this one small file
+manifest_path   = "data/results.json"
+
+# joint (baseline rate, ATE) bootstrap replicates for the What-If simulator —
+# a few thousand rows, kept next to the manifest as one small binary array
+replicates_path = "data/bootstrap.npy"
+
+# (replicates, K, K) pairwise contact-channel ATEs, drawn jointly
+channel_replicates_path = "data/channel_bootstrap.npy"
+
+
+def read_results(path=manifest_path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_results(section, values, path=manifest_path):
+    # each stage replaces only its own section, so re-running one stage
+    # keeps the other's numbers
+    results = read_results(path)
+    results[section] = {**values, "created": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+    # write then rename, so the dashboard never reads a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def write_replicates(baseline, ate, path=replicates_path):
+    np.save(path, np.column_stack([baseline, ate]))
+
+
+def read_replicates(path=replicates_path):
+    # returns (baseline, ate) arrays
+    replicates = np.load(path)
+    return replicates[:, 0], replicates[:, 1]
+
+
+def write_channel_replicates(replicates, path=channel_replicates_path):
+    np.save(path, replicates)
+
+
+def read_channel_replicates(path=channel_replicates_path):
+    return np.load(path)
@@ -0,0 +1,177 @@
+import argparse
+import heapq
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from cleaning import load_encodings, transform, unseen_values
+from model_cache import cache_dir, load_fit
+from results import manifest_path, read_results
+from segments import load_cube, segment_index
+
+# turns a fitted model into a call list: streams a raw customer file, encodes
+# it with the saved vocabularies and writes each customer's propensity,
+# predicted uplift and the expected profit of calling them via cellular
+
+output_path = "data/scores.csv"
+chunksize   = 200_000
+
+# same defaults as the What-If simulator's sliders
+revenue_per_sub   = 250
+cost_per_cellular = 3.0
+cost_per_standard = 1.0
+
+
+def read_chunks(path, chunksize=chunksize):
+    # raw customer rows in bounded batches — semicolon CSV like bank-full.csv,
+    # or the same columns in a Parquet / Feather (Arrow IPC) file
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif ext in (".feather", ".arrow"):
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pandas()
+    else:
+        yield from pd.read_csv(path, sep=';', chunksize=chunksize)
+
+
+def load_model(model_path=None):
+    # the propensity half comes from the cached fit's JSON summary, the
+    # uplift half from the segment cube — no DoWhy import, no unpickling
+    results = read_results()
+    if model_path is None:
+        key = results.get("estimate", {}).get("cache_key")
+        if key is None:
+            raise FileNotFoundError(f"no fitted model recorded in {manifest_path} — run src/causal_model.py first")
+        fit = load_fit(key, objects=False)
+        if fit is None:
+            raise FileNotFoundError(f"fit {key} not found in {cache_dir}/ — run src/causal_model.py first")
+    else:
+        with open(model_path) as f:
+            fit = json.load(f)
+
+    model = {
+        "columns":   fit["columns"],
+        "coef":      np.asarray(fit["coef"]),
+        "intercept": fit["intercept"],
+        "ate":       fit["ate"],
+        "cube":      None,
+    }
+    segments = results.get("segments")
+    if segments and os.path.exists(segments["path"]):
+        model["cube"]     = load_cube(segments["path"])
+        model["min_size"] = segments["min_segment_size"]
+    return model
+
+
+def score_chunk(df, model, revenue, cost_cellular, cost_standard):
+    X          = df[model["columns"]].to_numpy(dtype=float)
+    propensity = 1 / (1 + np.exp(-(X @ model["coef"] + model["intercept"])))
+
+    # segment CATE where the segment is big enough to trust, population ATE elsewhere
+    uplift = np.full(len(df), model["ate"])
+    cube   = model["cube"]
+    if cube is not None:
+        idx     = segment_index(df['job'].to_numpy(), df['age'].to_numpy(), df['balance'].to_numpy(), cube["cate"].shape)
+        cate    = cube["cate"].ravel()[idx]
+        trusted = (cube["n"].ravel()[idx] >= model["min_size"]) & np.isfinite(cate)
+        uplift  = np.where(trusted, cate, uplift)
+
+    return pd.DataFrame({
+        "propensity":      propensity,
+        "uplift":          uplift,
+        # extra profit from a cellular call over a standard one
+        "expected_profit": revenue * uplift - (cost_cellular - cost_standard),
+    }, index=df.index)
+
+
+def positive_int(value):
+    value = int(value)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def score_file(source, target=output_path, top_k=None, id_column=None, model_path=None, chunksize=chunksize,
+               revenue=revenue_per_sub, cost_cellular=cost_per_cellular, cost_standard=cost_per_standard):
+    if top_k is not None and top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+
+    model     = load_model(model_path)
+    encodings = load_encodings()
+    print(f"Scoring {source} with encodings v{encodings['version']}"
+          f"{' and segment CATEs' if model['cube'] is not None else ''}")
+
+    # top-K keeps a min-heap of the best K seen so far, so memory is bounded
+    # by K and the chunk size however long the file is
+    heap, rows, offset = [], 0, 0
+    scores = None
+    for i, chunk in enumerate(read_chunks(source, chunksize)):
+        # a header-only CSV still yields one (untyped) empty chunk
+        if chunk.empty:
+            continue
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset     += len(chunk)
+
+        unseen = unseen_values(chunk, encodings)
+        if unseen:
+            print(f"  chunk {i}: unseen categories mapped to fallback: {unseen}")
+
+        first  = scores is None
+        scores = score_chunk(transform(chunk, encodings), model, revenue, cost_cellular, cost_standard)
+        scores.insert(0, id_column or "row", chunk[id_column] if id_column else chunk.index)
+        rows += len(scores)
+
+        if top_k is None:
+            scores.to_csv(target, index=False, header=first, mode='w' if first else 'a')
+            continue
+
+        # only rows at or above this chunk's K-th best can make the overall top K
+        # (keeping every tie at the cut, so the heap decides them consistently)
+        profit = scores["expected_profit"].to_numpy()
+        cutoff = np.partition(profit, -top_k)[-top_k] if len(profit) > top_k else -np.inf
+        best   = np.flatnonzero(profit >= cutoff)
+        for value, pos, values in zip(profit[best], scores.index[best], scores.iloc[best].itertuples(index=False, name=None)):
+            # ties go to the earlier row
+            item = (value, -pos, values)
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+    if scores is None:
+        print(f"No rows in {source} — nothing written")
+        return
+
+    if top_k is not None:
+        ranked = [row for _, _, row in sorted(heap, key=lambda item: (-item[0], -item[1]))]
+        pd.DataFrame(ranked, columns=scores.columns).to_csv(target, index=False)
+        print(f"Scored {rows:,} customers — kept the top {len(ranked):,} by expected profit")
+    else:
+        print(f"Scored {rows:,} customers")
+    print(f"Saved to {target}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score customers by expected uplift from cellular contact")
+    parser.add_argument("input", help="raw customer file (semicolon CSV, .parquet or .feather)")
+    parser.add_argument("--output", default=output_path, help="CSV of scores to write")
+    parser.add_argument("--top-k", type=positive_int, default=None,
+                        help="only keep the K customers with the highest expected profit")
+    parser.add_argument("--id-column", default=None, help="input column to carry through as the customer id")
+    parser.add_argument("--model", default=None,
+                        help=f"fitted model JSON (default: the fit recorded in {manifest_path})")
+    parser.add_argument("--chunksize", type=int, default=chunksize, help="rows per streamed batch")
+    parser.add_argument("--revenue", type=float, default=revenue_per_sub, help="revenue per subscription ($)")
+    parser.add_argument("--cost-cellular", type=float, default=cost_per_cellular, help="cost per cellular call ($)")
+    parser.add_argument("--cost-standard", type=float, default=cost_per_standard, help="cost per standard call ($)")
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, top_k=args.top_k, id_column=args.id_column, model_path=args.model,
+               chunksize=args.chunksize, revenue=args.revenue,
+               cost_cellular=args.cost_cellular, cost_standard=args.cost_standard)
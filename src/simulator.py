@@ -0,0 +1,170 @@
+import argparse
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Monte Carlo engine behind the What-If page: every campaign size and every
+# sampled (baseline rate, ATE) pair is evaluated in one broadcast, so a slider
+# move is a few array operations instead of a Python loop per size
+
+campaign_sizes = np.arange(1000, 101000, 1000)
+num_draws      = 20000
+bands          = (5, 50, 95)
+
+# break-even sweep grid, on the What-If sliders' own steps so every slider
+# setting is a grid point: 196 x 37 x 19 x 10 = ~1.4M scenarios
+sweep_axes = {
+    "revenue":       np.arange(50, 2001, 10, dtype=float),
+    "cost_cellular": np.arange(1.0, 10.01, 0.25),
+    "cost_standard": np.arange(0.5, 5.01, 0.25),
+    "size":          np.arange(10000, 100001, 10000, dtype=float),
+}
+sweep_path = "data/sweep.feather"
+
+
+def draw_rates(baseline, ate, center_baseline, center_ate, boot_baseline, boot_ate, n_draws=num_draws, seed=0):
+    # resample the bootstrap replicates and shift them onto the published
+    # point estimates — keeps the spread and the baseline/ATE correlation
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(ate), size=n_draws)
+    return (
+        center_baseline + (baseline[idx] - boot_baseline),
+        center_ate      + (ate[idx]      - boot_ate),
+    )
+
+
+def simulate(sizes, baseline, ate, revenue, cost_cellular, cost_standard, bands=bands):
+    # with a fixed revenue per subscription and a fixed cost per call, campaign
+    # profit is the per-call margin times the campaign size — so the margin is
+    # computed once per sampled world and the percentile bands scale linearly
+    # across every campaign size in one broadcast
+    baseline_margin  = revenue * baseline         - cost_standard
+    strategic_margin = revenue * (baseline + ate) - cost_cellular
+    margins = np.stack([baseline_margin, strategic_margin, strategic_margin - baseline_margin])
+
+    # (bands, 3) percentiles -> (bands, 3, sizes) profits
+    sizes  = np.asarray(sizes, dtype=float)
+    profit = np.percentile(margins, bands, axis=1)[:, :, None] * sizes
+
+    return {
+        "baseline":    profit[:, 0],
+        "strategic":   profit[:, 1],
+        "added":       profit[:, 2],
+        # size scales the profit but not its sign, so one probability holds
+        # for every campaign size
+        "prob_profit": (margins[2] > 0).mean(),
+        # ATE at which cellular calls exactly pay for their extra cost
+        "break_even":  (cost_cellular - cost_standard) / revenue,
+    }
+
+
+def target_segments(cate, n, revenue, cost_cellular, cost_standard, min_size):
+    # per-call gain from switching each cube segment to cellular — a segment
+    # is targeted when that gain is positive and it has enough customers to
+    # trust its CATE; everyone else keeps the standard call
+    margin   = revenue * cate - (cost_cellular - cost_standard)
+    targeted = (n >= min_size) & (margin > 0)
+    share    = n / n.sum()
+
+    return {
+        "margin":        margin,
+        "targeted":      targeted,
+        "share":         share[targeted].sum(),
+        # expected added profit per customer in the population, calling
+        # cellular only where it pays versus switching everyone
+        "added_per_call": np.where(targeted, margin * share, 0.0).sum(),
+    }
+
+
+def compare_channels(ate_draws, reference, revenue, costs, bands=bands):
+    # per-call gain of every contact channel over the reference, across the
+    # bootstrapped channel ATEs: ate_draws is (draws, K, K) from the channel
+    # fit and costs the per-call cost of each channel. Like simulate(), the
+    # baseline rate cancels, so the gain is revenue * lift - extra cost
+    costs   = np.asarray(costs, dtype=float)
+    lift    = ate_draws[:, :, reference]
+    margins = revenue * lift - (costs - costs[reference])
+
+    return {
+        "margin":    np.percentile(margins, bands, axis=0),
+        # share of sampled worlds in which each channel pays best per call
+        "prob_best": np.bincount(margins.argmax(axis=1), minlength=len(costs)) / len(margins),
+        # lift each channel needs over the reference to cover its extra cost
+        "break_even": (costs - costs[reference]) / revenue,
+    }
+
+
+def sweep(ate, ate_draws, axes=sweep_axes):
+    # every (revenue, cellular cost, standard cost, size) scenario in one
+    # broadcast. Added profit over the status quo is size * (revenue * ate -
+    # (cellular - standard)) — the baseline rate cancels — so the break-even
+    # lift and the chance of beating the baseline don't depend on size and
+    # only need the 3-D cost grid
+    revenue, cellular, standard, size = np.ix_(*(np.asarray(values, dtype=float) for values in axes.values()))
+    revenue, cellular, standard = revenue[..., 0], cellular[..., 0], standard[..., 0]
+
+    extra_cost = cellular - standard
+    per_call   = revenue * ate - extra_cost
+    break_even = extra_cost / revenue
+
+    # share of sampled ATEs above each break-even lift, by binary search over
+    # the sorted draws instead of a (grid x draws) comparison
+    draws       = np.sort(np.asarray(ate_draws))
+    prob_profit = 1 - np.searchsorted(draws, break_even, side="right") / len(draws)
+
+    return {
+        "axes":         {name: np.asarray(values, dtype=float) for name, values in axes.items()},
+        "per_call":     per_call,
+        "break_even":   break_even,
+        "prob_profit":  prob_profit,
+        "added_profit": (per_call[..., None] * size.reshape(1, 1, 1, -1)).astype(np.float32),
+    }
+
+
+def sweep_table(grid, ate=None):
+    # long format, one row per scenario: float32 columns in C order of the
+    # grid, with the axes and the ATE in the schema metadata
+    shape   = grid["added_profit"].shape
+    mesh    = np.meshgrid(*grid["axes"].values(), indexing="ij", copy=False)
+    columns = {name: values.astype(np.float32).ravel() for name, values in zip(grid["axes"], mesh)}
+    columns["added_profit"] = grid["added_profit"].ravel()
+    columns["prob_profit"]  = np.broadcast_to(grid["prob_profit"][..., None], shape).astype(np.float32).ravel()
+
+    metadata = {f"axis_{name}": ",".join(f"{v:g}" for v in values) for name, values in grid["axes"].items()}
+    if ate is not None:
+        metadata["ate"] = repr(float(ate))
+    return pa.table(columns).replace_schema_metadata(metadata)
+
+
+def write_sweep(grid, path=sweep_path, ate=None):
+    feather.write_feather(sweep_table(grid, ate), path, compression="zstd")
+
+
+def sweep_bytes(grid, ate=None):
+    # the same file, in memory, for the dashboard's download button
+    sink = pa.BufferOutputStream()
+    feather.write_feather(sweep_table(grid, ate), sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+
+if __name__ == "__main__":
+    from results import read_replicates, read_results
+
+    parser = argparse.ArgumentParser(description="Sweep campaign profit over revenue x call costs x campaign size")
+    parser.add_argument("--output", default=sweep_path, help="columnar (Feather) file to write the grid to")
+    args = parser.parse_args()
+
+    estimate = read_results()["estimate"]
+    baseline, ate = read_replicates(estimate["bootstrap"]["path"])
+    draws = draw_rates(baseline, ate, estimate["baseline_rate"], estimate["ate"],
+                       estimate["bootstrap"]["baseline_rate"], estimate["bootstrap"]["ate"])
+
+    start = time.perf_counter()
+    grid  = sweep(estimate["ate"], draws[1])
+    swept = time.perf_counter() - start
+    write_sweep(grid, args.output, estimate["ate"])
+
+    profitable = (grid["per_call"] > 0).mean()
+    print(f"Swept {grid['added_profit'].size:,} scenarios in {swept * 1000:.0f}ms -> {args.output}")
+    print(f"Cellular beats the status quo in {profitable:.0%} of revenue x cost settings at ATE {estimate['ate']:.4f}")
@@ -0,0 +1,218 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+# span timers for the pipeline stages (load, identify, estimate, each refuter
+# simulation), with optional cProfile and tracemalloc capture per stage
+#
+# off by default: span() then hands back one shared no-op context manager, so
+# an untraced run pays a dict lookup per stage and nothing else
+
+trace_path = "artifacts/trace.json"
+
+# functions kept from each stage's profile, by cumulative time
+profile_top = 15
+
+_options  = {"enabled": False, "profile": False, "memory": False}
+_spans    = []   # finished spans, in the order they closed
+_stack    = []   # spans currently open in this process
+_state    = {"next_id": 0, "started": None, "profiler": None}
+_disabled = nullcontext()
+
+
+def enable(profile=False, memory=False):
+    # (re)start a trace in this process — also called in pool workers
+    _options.update(enabled=True, profile=profile, memory=memory)
+    _spans.clear()
+    _stack.clear()
+    _state.update(next_id=0, started=time.time(), profiler=None)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def enabled():
+    return _options["enabled"]
+
+
+def options():
+    # what a worker process needs to trace the same way, or None when off
+    if not _options["enabled"]:
+        return None
+    return {"profile": _options["profile"], "memory": _options["memory"]}
+
+
+def span(name, profile=False, **attrs):
+    # profile=True marks a stage worth a cProfile capture when --profile is on;
+    # only one profiler can run at a time, so spans nested inside it are timed only
+    if not _options["enabled"]:
+        return _disabled
+    return _Span(name, profile and _options["profile"], attrs)
+
+
+class _Span:
+
+    def __init__(self, name, profile, attrs):
+        self.record = {
+            "id":     f"{os.getpid()}-{_state['next_id']}",
+            "parent": _stack[-1].record["id"] if _stack else None,
+            "name":   name,
+            "attrs":  attrs,
+            "pid":    os.getpid(),
+        }
+        _state["next_id"] += 1
+        self.profile = profile and _state["profiler"] is None
+        self.peak    = 0
+
+    def __enter__(self):
+        if _options["memory"]:
+            # fold the parent's peak so far into it before the counter is reset
+            current, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+
+        if self.profile:
+            _state["profiler"] = cProfile.Profile()
+            _state["profiler"].enable()
+
+        _stack.append(self)
+        self.record["start"] = time.time()
+        self.begin           = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["seconds"] = time.perf_counter() - self.begin
+        _stack.pop()
+
+        if self.profile:
+            profiler = _state["profiler"]
+            profiler.disable()
+            _state["profiler"] = None
+            self.record["profile"] = top_functions(profiler)
+
+        if _options["memory"]:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            self.record["alloc_peak_mb"] = (peak - self.base) / 2 ** 20
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+
+        _spans.append(self.record)
+        return False
+
+
+def top_functions(profiler, n=profile_top):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows  = []
+    for (path, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(path)}:{line}({func})",
+            "calls":    calls,
+            "tottime":  tottime,
+            "cumtime":  cumtime,
+        })
+    return sorted(rows, key=lambda row: -row["cumtime"])[:n]
+
+
+def drain():
+    # hand this process's finished spans over (pool workers return them with
+    # each result) and start collecting afresh
+    spans = list(_spans)
+    _spans.clear()
+    return spans
+
+
+def adopt(spans):
+    # spans from a worker land under whichever span is open here; start times
+    # are epoch seconds, so they line up with this process's without rebasing
+    if not _options["enabled"]:
+        return
+    parent = _stack[-1].record["id"] if _stack else None
+    ids    = {record["id"] for record in spans}
+    for record in spans:
+        if record["parent"] not in ids:
+            record["parent"] = parent
+        _spans.append(record)
+
+
+def summary(spans=None):
+    # one row per span name: calls, total/mean/max seconds and peak allocation
+    spans = _spans if spans is None else spans
+    rows  = {}
+    for record in spans:
+        row = rows.setdefault(record["name"], {"name": record["name"], "calls": 0, "total_s": 0.0, "max_s": 0.0})
+        row["calls"]   += 1
+        row["total_s"] += record["seconds"]
+        row["max_s"]    = max(row["max_s"], record["seconds"])
+        if "alloc_peak_mb" in record:
+            row["alloc_peak_mb"] = max(row.get("alloc_peak_mb", 0.0), record["alloc_peak_mb"])
+    for row in rows.values():
+        row["mean_s"] = row["total_s"] / row["calls"]
+    return list(rows.values())
+
+
+def print_summary(spans=None):
+    rows   = summary(spans)
+    memory = any("alloc_peak_mb" in row for row in rows)
+    print(f"\n  {'stage':<32} {'calls':>6} {'total':>9} {'mean':>9} {'max':>9}" + (f" {'alloc':>9}" if memory else ""))
+    for row in rows:
+        line = f"  {row['name']:<32} {row['calls']:>6} {row['total_s']:>8.3f}s {row['mean_s']:>8.3f}s {row['max_s']:>8.3f}s"
+        if memory:
+            line += f" {row.get('alloc_peak_mb', 0.0):>7.1f}MB"
+        print(line)
+
+
+def write_trace(path=trace_path):
+    # the JSON trace the dashboard's diagnostics panel reads — atomic like the
+    # manifest, with span starts as seconds since the trace began
+    spans = [dict(record, start=record["start"] - _state["started"]) for record in _spans]
+    trace = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "command": " ".join([os.path.basename(sys.argv[0])] + sys.argv[1:]),
+        "options": options(),
+        "spans":   sorted(spans, key=lambda record: record["start"]),
+        "summary": summary(),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(trace, f, indent=2)
+    os.replace(tmp, path)
+    return trace
+
+
+def read_trace(path=trace_path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def add_arguments(parser):
+    parser.add_argument("--trace", action="store_true",
+                        help=f"time each stage and write a JSON trace to {trace_path}")
+    parser.add_argument("--profile", action="store_true",
+                        help="also capture a cProfile of each stage (implies --trace)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record each stage's tracemalloc peak (implies --trace)")
+
+
+def start_from_args(args):
+    if args.trace or args.profile or args.trace_memory:
+        enable(profile=args.profile, memory=args.trace_memory)
+
+
+def finish(path=trace_path):
+    # print the summary table and write the trace, if this run was traced
+    if not _options["enabled"]:
+        return None
+    print_summary()
+    trace = write_trace(path)
+    print(f"\nTrace written to {path}")
+    return trace
@@ -0,0 +1,76 @@
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(repo_dir, "src"))
+
+# a small raw file in the UCI format (semicolon CSV, text categories,
+# 'unknown' entries, pdays = -1 for never contacted), built from a seed so the
+# cleaning, scoring and api tests don't depend on data/ being present
+
+months = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+
+
+def raw_frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+
+    def pick(values, p=None):
+        return rng.choice(values, size=n, p=p)
+
+    return pd.DataFrame({
+        'age':       rng.integers(18, 90, n),
+        'job':       pick(['admin.', 'blue-collar', 'management', 'retired', 'student', 'technician', 'unknown']),
+        'marital':   pick(['divorced', 'married', 'single']),
+        'education': pick(['primary', 'secondary', 'tertiary', 'unknown']),
+        'default':   pick(['no', 'yes'], [0.9, 0.1]),
+        'balance':   rng.integers(-2000, 20000, n),
+        'housing':   pick(['no', 'yes']),
+        'loan':      pick(['no', 'yes'], [0.8, 0.2]),
+        'contact':   pick(['cellular', 'telephone', 'unknown'], [0.6, 0.1, 0.3]),
+        'day':       rng.integers(1, 29, n),
+        'month':     pick(months),
+        'duration':  rng.integers(0, 1000, n),
+        'campaign':  rng.integers(1, 10, n),
+        'pdays':     np.where(rng.random(n) < 0.8, -1, rng.integers(1, 400, n)),
+        'previous':  rng.integers(0, 5, n),
+        'poutcome':  pick(['failure', 'other', 'success', 'unknown'], [0.1, 0.05, 0.05, 0.8]),
+        'y':         pick(['no', 'yes'], [0.88, 0.12]),
+    })
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # the stages use repo-relative paths (data/encodings.json, ...), so each
+    # test runs in its own scratch directory whose data/ only holds the graph
+    # spec (modules that build the graph on import are imported inside tests)
+    (tmp_path / "data").mkdir()
+    shutil.copy(os.path.join(repo_dir, "data", "dag.json"), tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def raw_path(workspace):
+    path = workspace / "data" / "bank-full.csv"
+    raw_frame().to_csv(path, sep=';', index=False)
+    return str(path)
+
+
+@pytest.fixture
+def cleaned(raw_path):
+    # the sample cleaned into data/, with a segment cube over it recorded in
+    # the manifest — customers in one segment share an uplift
+    from cleaning import clean_data
+    from results import write_results
+    from segments import build_cube, save_cube
+
+    clean_data(raw_path)
+    df = pd.read_csv("data/bank-full-cleaned.csv")
+    save_cube(build_cube(df, np.array([0.2, 0.4, 0.6, 0.8]), np.random.default_rng(0).random(len(df))))
+    write_results("segments", {"path": "data/cate_cube.npz", "min_segment_size": 5})
+    return df
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("httpx")
+from starlette.testclient import TestClient
+
+
+@pytest.fixture
+def client(cleaned):
+    from api import create_app
+    from results import write_replicates, write_results
+
+    rng = np.random.default_rng(0)
+    write_replicates(0.06 + 0.002 * rng.standard_normal(500), 0.07 + 0.01 * rng.standard_normal(500))
+    write_results("estimate", {
+        "ate":           0.07,
+        "baseline_rate": 0.06,
+        "bootstrap":     {"path": "data/bootstrap.npy", "ate": 0.07, "baseline_rate": 0.06},
+    })
+    with TestClient(create_app("data/results.json")) as client:
+        yield client
+
+
+@pytest.mark.parametrize("query, message", [
+    ("customers=abc",        "customers must be a number"),
+    ("customers=0",          "customers must be between"),
+    ("revenue=-5",           "revenue must be between"),
+    ("cost_cellular=1e9",    "cost_cellular must be between"),
+])
+def test_simulate_rejects_bad_parameters(client, query, message):
+    response = client.get(f"/simulate?{query}")
+    assert response.status_code == 400
+    assert message in response.json()["error"]
+
+
+def test_simulate_parses_before_caching(client):
+    first  = client.get("/simulate?customers=5000&revenue=250")
+    second = client.get("/simulate?customers=5000&revenue=250.0")
+    assert first.status_code == 200
+    assert first.content == second.content
+    assert client.get("/health").json()["cache"]["simulate"]["hits"] == 1
+
+
+def test_cate_validation(client):
+    assert client.get("/cate?job=astronaut&age=40&balance=100").status_code == 400
+    assert client.get("/cate?job=99&age=40&balance=100").status_code == 400
+    assert client.get("/cate?job=student&age=forty&balance=100").status_code == 400
+
+    body = client.get("/cate?job=student&age=25&balance=100").json()
+    assert (body["job"], body["age"], body["balance"]) == ("student", "<30", "0-999")
+    assert client.get("/cate?job=4&age=25&balance=100").status_code == 200
+
+
+def test_refutations_missing(client):
+    assert client.get("/refutations").status_code == 404
@@ -0,0 +1,62 @@
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import raw_frame
+from cleaning import (clean_data, clean_data_streaming, gather_stats, load_encodings, output_path, resolve_target,
+                      save_encodings, transform)
+
+
+def test_streaming_matches_in_memory(raw_path):
+    clean_data(raw_path, "data/batch.csv")
+    clean_data_streaming(97, raw_path, "data/streamed.csv")
+    with open("data/batch.csv", "rb") as a, open("data/streamed.csv", "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_apply_maps_unseen_categories_to_fallback(raw_path):
+    clean_data(raw_path, "data/train.csv")
+    encodings = load_encodings()
+
+    batch = raw_frame(n=5, seed=1)
+    batch['job'] = ['astronaut', 'admin.', 'unknown', 'student', 'astronaut']
+    batch.to_csv("data/new.csv", sep=';', index=False)
+    clean_data("data/new.csv", apply=True)
+
+    cleaned = pd.read_csv("data/new-cleaned.csv")
+    vocab   = encodings["vocab"]["job"]
+    assert cleaned['job'].tolist() == [vocab.index(encodings["fallback"]["job"]), vocab.index('admin.'),
+                                       vocab.index(encodings["modes"]["job"]), vocab.index('student'),
+                                       vocab.index(encodings["fallback"]["job"])]
+    # applying never refits the saved encodings
+    assert load_encodings() == encodings
+
+
+def test_apply_rejects_unmapped_month(raw_path):
+    clean_data(raw_path, "data/train.csv")
+    batch = raw_frame(n=3, seed=2)
+    batch['month'] = ['may', 'sept', 'jun']
+    with pytest.raises(ValueError, match="'month'"):
+        transform(batch, load_encodings())
+
+
+def test_apply_refuses_to_overwrite_training_data():
+    assert resolve_target("data/new.csv", None, apply=True) == "data/new-cleaned.csv"
+    assert resolve_target("data/new.csv", None, apply=False) == output_path
+    with pytest.raises(ValueError, match="training data"):
+        resolve_target("data/new.csv", output_path, apply=True)
+    with pytest.raises(ValueError, match="training data"):
+        resolve_target("data/bank-full.csv", None, apply=True)
+
+
+def test_encodings_version_only_moves_on_change(workspace):
+    path = "data/encodings.json"
+    encodings, rows = gather_stats([raw_frame()])
+    assert save_encodings(encodings, rows, "a.csv", path) == 1
+    assert save_encodings(encodings, rows, "b.csv", path) == 1
+
+    changed, rows = gather_stats([raw_frame().replace({'job': {'student': 'astronaut'}})])
+    assert save_encodings(changed, rows, "c.csv", path) == 2
+    with open(path) as f:
+        assert json.load(f)["fitted_on"] == "c.csv"
@@ -0,0 +1,106 @@
+import os
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(repo_dir, "src"))
+from dag import build_graph, common_causes, pin_backdoor_order
+from estimators import (ate_from_cells, bootstrap_ate, cell_counts, contrast_ates, estimate_ate, estimate_channel_ates,
+                        jackknife_ate, placebo_ate, stratified_ate)
+
+warnings.filterwarnings('ignore')
+
+# the native engine claims to be DoWhy's propensity score stratification on
+# plain arrays — check that on a fixed sample, with DoWhy's adjustment set
+# pinned to the spec order the way dag.identify does it
+
+cleaned_path = os.path.join(repo_dir, "data", "bank-full-cleaned.csv")
+dag_path     = os.path.join(repo_dir, "data", "dag.json")
+sample_rows  = 5000
+sample_seed  = 0
+
+
+@pytest.fixture(scope="module")
+def sample():
+    if not os.path.exists(cleaned_path):
+        pytest.skip(f"{cleaned_path} not found — run src/cleaning.py first")
+    return pd.read_csv(cleaned_path).sample(n=sample_rows, random_state=sample_seed)
+
+
+def test_native_ate_matches_dowhy(sample):
+    dowhy = pytest.importorskip("dowhy")
+    graph       = build_graph(dag_path)
+    confounders = common_causes(graph)
+
+    model    = dowhy.CausalModel(data=sample, treatment='treatment', outcome='outcome', graph=graph)
+    estimand = pin_backdoor_order(model.identify_effect(proceed_when_unidentifiable=True), graph)
+    expected = model.estimate_effect(estimand, method_name="backdoor.propensity_score_stratification",
+                                     target_units="ate").value
+
+    native = estimate_ate(sample[confounders], sample['treatment'], sample['outcome'])
+    assert native["ate"] == pytest.approx(expected, abs=1e-12)
+
+
+# the resampling routines work on a fixed (strata, treatment, outcome) design:
+# 8 strata, treatment more likely in the higher ones, and a true effect of 0.1
+
+@pytest.fixture(scope="module")
+def design():
+    rng    = np.random.default_rng(0)
+    strata = rng.integers(0, 8, 4000)
+    t      = (rng.random(4000) < 0.2 + 0.07 * strata).astype(int)
+    y      = (rng.random(4000) < 0.1 + 0.02 * strata + 0.1 * t).astype(int)
+    return strata, t, y
+
+
+def test_jackknife_matches_dropping_each_row(design):
+    counts = cell_counts(*design)
+    jack   = jackknife_ate(counts)
+    for cell in [(0, 0, 0), (3, 1, 1), (7, 0, 1)]:
+        dropped = counts.copy()
+        dropped[cell] -= 1
+        assert jack[cell] == pytest.approx(ate_from_cells(dropped), abs=1e-12)
+
+
+def test_bootstrap_intervals(design):
+    boot = bootstrap_ate(*design, n_boot=4000, seed=1)
+    again = bootstrap_ate(*design, n_boot=4000, seed=1)
+
+    assert boot["ate"] == pytest.approx(stratified_ate(*design), abs=1e-12)
+    assert np.array_equal(boot["replicates"], again["replicates"])
+    for lo, hi in (boot["percentile_ci"], boot["bca_ci"]):
+        assert lo < boot["ate"] < hi
+    # the effect is far from any boundary, so BCa barely moves the percentile interval
+    assert np.allclose(boot["bca_ci"], boot["percentile_ci"], atol=0.25 * boot["se"])
+    assert boot["se"] == pytest.approx(np.std(boot["replicates"], ddof=1))
+
+
+def test_placebo_null(design):
+    strata, t, y = design
+    real = placebo_ate(strata, t, y, n_perm=2000, seed=2)
+    assert real["ate"] == pytest.approx(stratified_ate(strata, t, y), abs=1e-12)
+    assert real["p_value"] == pytest.approx(1 / 2001)
+    assert abs(real["new_effect"]) < 3 * real["null"].std() / np.sqrt(2000)
+
+    # with the treatment already random the real assignment is unremarkable
+    shuffled = np.random.default_rng(3).permutation(t)
+    assert placebo_ate(strata, shuffled, y, n_perm=2000, seed=2)["p_value"] > 0.05
+
+
+def test_channel_contrasts():
+    rng     = np.random.default_rng(4)
+    X       = rng.normal(size=(6000, 2))
+    logits  = X @ np.array([[0.0, 0.8, -0.5], [0.0, -0.3, 0.6]])
+    channel = (logits + rng.gumbel(size=(6000, 3))).argmax(axis=1)
+    y       = (rng.random(6000) < 0.1 + 0.05 * channel).astype(int)
+
+    fit = estimate_channel_ates(X, channel, y, n_boot=200, seed=5)
+    assert np.allclose(np.diag(fit["ate"]), 0)
+    assert np.allclose(fit["ate"], -fit["ate"].T)
+    assert (fit["ci"][0] <= fit["ate"] + 1e-12).all() and (fit["ate"] <= fit["ci"][1] + 1e-12).all()
+    # with two channels, a contrast is exactly the binary stratified ATE
+    pair = fit["counts"][:, :2]
+    assert contrast_ates(pair)[1, 0] == pytest.approx(ate_from_cells(pair), abs=1e-12)
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from scipy.special import expit
+
+from estimators import assign_strata, ate_from_sums, stratum_sums
+
+
+def test_fold_in_matches_a_full_pass_with_the_frozen_model(cleaned):
+    from incremental import confounders, fit_state, fold_in, state_ate
+
+    first, batch = cleaned.iloc[:300], cleaned.iloc[300:]
+    first.to_csv("data/bank-full-cleaned.csv", index=False)
+    state = fold_in(fit_state(first, "data/bank-full-cleaned.csv"), batch)
+
+    # the same frozen model and edges applied to every row in one go
+    ps     = expit(cleaned[confounders].to_numpy(float) @ state["coef"] + state["intercept"])
+    strata = assign_strata(ps, state["edges"])
+    sums   = stratum_sums(strata, cleaned['treatment'].to_numpy(float), cleaned['outcome'].to_numpy(float),
+                          minlength=len(state["edges"]) + 1)
+
+    assert np.allclose(state["sums"], np.vstack(sums))
+    assert state_ate(state) == pytest.approx(float(ate_from_sums(*sums)))
+    assert int(state["rows"]) == len(cleaned) and int(state["fitted_rows"]) == 300
+    assert state["new_bins"].sum() == len(batch)
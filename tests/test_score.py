@@ -0,0 +1,23 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def test_top_k_matches_full_sort(raw_path, cleaned):
+    from score import score_file
+
+    with open("data/model.json", "w") as f:
+        json.dump({"columns": ["age", "balance"], "coef": [0.01, 0.0], "intercept": -1.0, "ate": 0.05}, f)
+
+    score_file(raw_path, "data/all.csv", model_path="data/model.json", chunksize=37)
+    full   = pd.read_csv("data/all.csv")
+    ranked = full.sort_values("expected_profit", ascending=False, kind="stable").reset_index(drop=True)
+
+    # cut inside a run of equal profits, so the tie-break decides membership
+    profit = ranked["expected_profit"].to_numpy()
+    assert len(np.unique(profit)) > 1
+    k = int(np.flatnonzero(profit[:-1] == profit[1:])[len(profit) // 4]) + 1
+
+    score_file(raw_path, "data/top.csv", top_k=k, model_path="data/model.json", chunksize=37)
+    pd.testing.assert_frame_equal(pd.read_csv("data/top.csv"), ranked.head(k))
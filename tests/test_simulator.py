@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from simulator import sweep, sweep_table
+
+
+def test_sweep_matches_a_scenario_loop():
+    axes  = {
+        "revenue":       np.array([50.0, 250.0]),
+        "cost_cellular": np.array([2.0, 4.0, 8.0]),
+        "cost_standard": np.array([1.0, 2.0]),
+        "size":          np.array([1000.0, 5000.0]),
+    }
+    draws = np.random.default_rng(0).normal(0.05, 0.02, 1000)
+    grid  = sweep(0.05, draws, axes)
+
+    for i, revenue in enumerate(axes["revenue"]):
+        for j, cellular in enumerate(axes["cost_cellular"]):
+            for k, standard in enumerate(axes["cost_standard"]):
+                break_even = (cellular - standard) / revenue
+                per_call   = revenue * 0.05 - (cellular - standard)
+                assert grid["break_even"][i, j, k] == pytest.approx(break_even)
+                assert grid["prob_profit"][i, j, k] == pytest.approx((draws > break_even).mean())
+                assert grid["added_profit"][i, j, k] == pytest.approx(per_call * axes["size"], rel=1e-6)
+
+    table = sweep_table(grid, ate=0.05)
+    assert table.num_rows == 2 * 3 * 2 * 2
+    assert table.schema.metadata[b"ate"] == b"0.05"